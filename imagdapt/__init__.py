@@ -12,17 +12,23 @@ Overview:
     various extraction tools can be used to extract the part of the
     image defined by the grid.
 
+    A grid can also be bound to a `numpy` array (or any object
+    supporting the buffer protocol), in which case the results are
+    arrays too, and the result can be written into a given buffer (see
+    `Grid.extract`).
+
     The resulting image is a flatten perspective of the part, mapped to
     a rectangle according to the grid, of size the destination size
     provided when binding the grid.
 
     For a result example, use the command `python -m imagdapt test`.
+    For benchmarks, use the command `python -m imagdapt.bench`.
     For a code example, see in `__main__.py`.
 
 Extraction modes:
 -----------------
 
-    This module defines 3 extraction strategies:
+    This module defines 4 extraction strategies:
 
         1. `MODE_QUAD` - quadrilateral extraction:
             only uses the four corners of the grid; the shape hence
@@ -33,8 +39,53 @@ Extraction modes:
             in the result, all cells takes up the same size
 
         3. `MODE_POLY` - polynomial extraction:
-            TODO: extracts using continuous functions across the grid
-            to avoid the slicing that occur with the linear mode
+            extracts using a smooth surface (bicubic spline) through
+            every point of the grid to avoid the slicing that occur
+            with the linear mode
+
+        4. `MODE_PERSP` - perspective extraction:
+            proceed to extract each cell of the grid with the
+            homography mapping it to its rectangle in the result; the
+            perspective is correct within each cell (even a 2x2 grid
+            of a foreshortened plane is sampled uniformly)
+
+Extraction engines:
+-------------------
+
+    The extraction itself can be performed by different engines:
+
+        1. `ENGINE_PIXEL` - pixel by pixel (default):
+            computes the coordinates and samples the image for each
+            pixel of the result, see the `Extractor` class
+
+        2. `ENGINE_NUMPY` - array-based:
+            computes the coordinates of all the pixels of the result
+            as arrays and samples them at once from the image buffer,
+            see the `VectorExtractor` class; produces the same pixels
+
+        3. `ENGINE_PIL` - Pillow-based:
+            turns the grid into the data of an `Image.transform` call
+            (one quad per cell for `MODE_LINE`) so the sampling is
+            done in C, with a selectable resampling filter, see the
+            `MeshExtractor` class; produces close but not exactly the
+            same pixels
+
+    The coordinates computed by the `ENGINE_NUMPY` engine are compiled
+    into a `Remap` and cached (see `Remap.cache`), so that extracting
+    the same geometry again from another image only has to gather the
+    pixels.
+
+    Decoded images can also be cached, so that extracting from the same
+    file again does not decode it again, see `Util.cacheSources`.
+
+    The phases of an extraction (completing the grid, computing the
+    remap, decoding, sampling, transforming and assembling the result)
+    can be profiled by installing a sink, such as a `Profile`, with
+    `addSink`; nothing is measured when no sink is installed.
+
+    For use from `asyncio`, see `imagdapt.aio.AsyncExtractor`, which
+    runs openings, bindings and extractions in an executor, with a
+    bounded number of running and of waiting calls.
 
 Hum:
 ----
@@ -59,7 +110,7 @@ Hum:
                 D---------------------------------C
 """
 
-from time import time_ns
+from time import perf_counter_ns, time_ns
 
 def log(tag, *elm):
     """ logs data to stdout
@@ -95,18 +146,83 @@ def time(task, result):
 
     return r
 
+sinks = []
+
+def addSink(sink):
+    """ installs a profiling sink
+
+        `sink` is called with an event at the end of each phase of an
+        extraction (see `phase`); see `Profile` for a sink aggregating
+        the events
+
+        returns the `sink`
+    """
+    sinks.append(sink)
+    return sink
+
+def removeSink(sink):
+    """ uninstalls a profiling sink installed with `addSink`
+    """
+    sinks.remove(sink)
+
+def phase(name, task, **info):
+    """ runs `task` as the phase `name` of an extraction
+
+        calls `task.__call__` and returns what it returns; when no sink
+        is installed (see `addSink`), nothing else is done
+
+        otherwise every sink is called with the event, a `dict`
+        holding:
+         - 'phase': the name of the phase
+         - 'time': time, in nanoseconds, it took to execute the task
+         - the `info` given, such as 'mode' and 'pixels' (the number
+           of pixels processed)
+
+        the phases of an extraction are 'complete', 'remap', 'decode',
+        'sample', 'transform' and 'assemble', all within an 'extract'
+        phase for the whole of `Grid.extract`
+    """
+    if not sinks:
+        return task()
+
+    begin = perf_counter_ns()
+    r = task()
+    event = {'phase': name, 'time': perf_counter_ns() - begin, **info}
+    for sink in sinks:
+        sink(event)
+    return r
+
 MODE_QUAD = -1
 MODE_LINE = 2
 MODE_POLY = 3
+MODE_PERSP = 4
+
+ENGINE_PIXEL = 0
+ENGINE_NUMPY = 1
+ENGINE_PIL = 2
 
+from imagdapt.cache import Cache
+from imagdapt.profile import Profile
 from imagdapt.extra import Util, Extractor
+from imagdapt.transform import Transform
+from imagdapt.vector import VectorExtractor
+from imagdapt.mesh import MeshExtractor
+from imagdapt.remap import Remap
 from imagdapt.shape import Point, Grid
 
 __all__ = [
     'Util',
     'Point',
     'Grid',
+    'Cache',
+    'Profile',
+    'Remap',
+    'Transform',
     'MODE_QUAD',
     'MODE_LINE',
-    'MODE_POLY'
+    'MODE_POLY',
+    'MODE_PERSP',
+    'ENGINE_PIXEL',
+    'ENGINE_NUMPY',
+    'ENGINE_PIL'
 ]
@@ -1,98 +1,87 @@
 """ test with `"python -m imagdapt [test_name]"`
 
     available tests can be found as the keys of the `locations`
-    dictionary below
+    dictionary of `imagdapt.cases`
+
+    extract headlessly with `"python -m imagdapt extract manifest.json"`
+    (see `imagdapt.batch` for the manifest, and `--help` for options)
 """
 
-import imagdapt as iap
 import sys
-import matplotlib.pyplot as plt
-
-
-# maps pre-calculated locations for the available test pictures
-locations = { # size, dest, a, b, c, d, rows
-    "1": [
-        (2, 2), (800, 200),
-        (220, 90), (760, 128), (775, 380), (230, 300),
-        None
-    ],
-    "2": [
-        (2, 2), (800, 200),
-        (722, 555), (904, 523), (901, 562), (719, 596),
-        None
-    ],
-    "test": [
-        (2, 4), (800, 300),
-        (580, 446), (1004, 394), (999, 545), (581, 624),
-        { # `None`s in rows will be determine at runtime by `grd.complete`
-            'tops': None,
-            'rights': [ (1015, 433), None ],
-            'bottoms': None,
-            'lefts': [ (592, 503), None ]
-        }
-    ],
-    "test-full": [
-        (2, 2), (1200, 798),
-        (0, 0), (1200, 0), (1200, 798), (0, 798),
-        None
-    ]
-}
-tested = sys.argv[1] if 1 < len(sys.argv) else "test"
-
-
-size, dest, a, b, c, d, rows = locations[tested]
-grd = iap.Grid(
-    size[0], size[1],
-    topLeft=iap.Point(a),
-    topRight=iap.Point(b),
-    bottomRight=iap.Point(c),
-    bottomLeft=iap.Point(d)
-)
-if rows:
-    p = lambda l: (l if l is None else
-                   [it if it is None else iap.Point(it) for it in l])
-    grd.setRows(
-        p(rows['tops']),
-        p(rows['rights']),
-        p(rows['bottoms']),
-        p(rows['lefts'])
-    )
-grd.complete(rows=True, fill=True)
-print(grd)
 
 
-def blackAndWhite(pixel):
-    if 1 < len([v for v in pixel if v < 128]):
-        return (0, 0, 0)
-    return (255, 255, 255)
+def preview(tested):
+    """ extracts the test `tested` and plots the results
+    """
+    import imagdapt as iap
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from imagdapt.cases import locations, makeGrid, picturePath
+
+    dest = locations[tested][1]
+    grd = makeGrid(locations[tested])
+    print(grd)
+
 
-def invertColor(pixel):
-    r, g, b = pixel
-    return (255 - r, 255 - g, 255 - b)
+    @iap.Transform.vectorized
+    def blackAndWhite(pixels):
+        dark = 1 < (pixels < 128).sum(-1, keepdims=True)
+        r = np.where(dark, 0, 255).repeat(pixels.shape[-1], -1)
+        return r.astype(pixels.dtype)
 
-src = iap.Util.openImage(f"./imagdapt/test/{tested}/picture.jpg")
-grd.bind(src, dest)
+    invertColor = iap.Transform.invert()
 
-ext_quad = grd.extract(mode=iap.MODE_QUAD, transform=blackAndWhite)
-ext_line = grd.extract(mode=iap.MODE_LINE, transform=invertColor)
-ext_poly = grd.extract(mode=iap.MODE_POLY)
+    src = iap.Util.openImage(picturePath(tested))
+    grd.bind(src, dest)
 
+    ext_quad = grd.extract(mode=iap.MODE_QUAD, transform=blackAndWhite)
+    ext_line = grd.extract(mode=iap.MODE_LINE, transform=invertColor)
+    ext_poly = grd.extract(mode=iap.MODE_POLY)
 
-plt.figure(1)
 
-plt.subplot(121)
-plt.imshow(src)
-for k in range(len(grd)):
-    X, Y = grd.getPlotShape(k)
-    plt.plot(X, Y)
+    plt.figure(1)
 
-plt.subplot(322)
-plt.imshow(ext_quad)
+    plt.subplot(121)
+    plt.imshow(src)
+    for k in range(len(grd)):
+        X, Y = grd.getPlotShape(k)
+        plt.plot(X, Y)
 
-plt.subplot(324)
-plt.imshow(ext_line)
+    plt.subplot(322)
+    plt.imshow(ext_quad)
 
-plt.subplot(326)
-plt.imshow(ext_poly)
+    plt.subplot(324)
+    plt.imshow(ext_line)
 
-plt.show()
+    plt.subplot(326)
+    plt.imshow(ext_poly)
+
+    plt.show()
+
+def extract(argv):
+    """ runs the jobs of a manifest, see `imagdapt.batch`
+    """
+    import argparse
+    from imagdapt import batch
+
+    parser = argparse.ArgumentParser(
+        prog="python -m imagdapt extract",
+        description="Runs the extractions described by a JSON manifest."
+    )
+    parser.add_argument('manifest')
+    parser.add_argument('-o', '--output', default=".",
+                        help="directory of the results")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of processes (0 for none)")
+    args = parser.parse_args(argv)
+
+    for path in batch.run(batch.load(args.manifest, args.output),
+                          args.workers):
+        print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    if 1 < len(sys.argv) and sys.argv[1] == "extract":
+        sys.exit(extract(sys.argv[2:]))
+    preview(sys.argv[1] if 1 < len(sys.argv) else "test")
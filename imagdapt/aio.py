@@ -0,0 +1,135 @@
+import imagdapt as iap
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+class AsyncExtractor:
+    """ runs openings, bindings and extractions off the event loop
+
+        the calls are put in a queue of at most `queue` calls (by
+        default, twice the `limit`) and run by `limit` tasks (by
+        default, as many as CPUs) in the `executor` (by default, a
+        pool of `limit` threads: the decoding and sampling mostly
+        release the GIL); a call waits while the queue is full, so the
+        memory used is bounded whatever the number of callers
+
+        a call cancelled while in the queue is never run; a call
+        cancelled while running completes in the executor, but its
+        result is dropped
+
+        an `AsyncExtractor` can be shared by concurrent requests, but
+        a grid must not be used by several of them at the same time
+        (binding it changes it, see `Grid.bind`); use `Grid.copy`
+
+        use it as an `async with` context, or call `close`:
+        ```
+            async with AsyncExtractor(limit=4) as aex:
+                image = await aex.open(path)
+                await aex.bind(grid, image, (800, 300))
+                result = await aex.extract(grid, iap.MODE_LINE)
+        ```
+    """
+    def __init__(self, limit=None, queue=None, executor=None):
+        self.limit = limit or os.cpu_count()
+        self.executor = executor or ThreadPoolExecutor(self.limit)
+        self.owned = executor is None
+        self.queue = asyncio.Queue(queue or 2 * self.limit)
+        self.tasks = []
+
+    def __repr__(self):
+        """ returns `"AsyncExtractor({queued}/{maxsize}, {limit})"`
+        """
+        return "AsyncExtractor({}/{}, {})".format(
+            self.queue.qsize(), self.queue.maxsize,
+            self.limit
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def run(self, function, *args, **kw):
+        """ calls `function(*args, **kw)` in the executor
+
+            waits for room in the queue, then for the call to be run;
+            returns what `function` returns (or raises what it raises)
+        """
+        loop = asyncio.get_running_loop()
+        if not self.tasks:
+            self.tasks = [
+                loop.create_task(self.work())
+                for _ in range(self.limit)
+            ]
+
+        future = loop.create_future()
+        await self.queue.put((partial(function, *args, **kw), future))
+        return await future
+
+    async def work(self):
+        """ runs the queued calls, one at a time (see `AsyncExtractor.run`)
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            call, future = await self.queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                try:
+                    r = await loop.run_in_executor(self.executor, call)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    if not future.cancelled():
+                        future.set_exception(e)
+                else:
+                    if not future.cancelled():
+                        future.set_result(r)
+            finally:
+                self.queue.task_done()
+
+    async def open(self, fp, **kw):
+        """ opens and decodes an image, see `Util.openImage`
+        """
+        def load():
+            image = iap.Util.openImage(fp, **kw)
+            image.load()
+            return image
+
+        return await self.run(load)
+
+    async def bind(self, grid, image, destSize):
+        """ binds an image (or a path) to `grid`, see `Grid.bind`
+
+            binding a path decodes its region of the image
+        """
+        return await self.run(grid.bind, image, destSize)
+
+    async def extract(self, grid, mode=iap.MODE_LINE, transform=None,
+                      **options):
+        """ extracts from a bound `grid`, see `Grid.extract`
+
+            `options` are passed to `Grid.extract`, e.g. `engine`
+            (`ENGINE_NUMPY` by default)
+        """
+        options.setdefault('engine', iap.ENGINE_NUMPY)
+        return await self.run(grid.extract, mode, transform, **options)
+
+    async def close(self):
+        """ stops the tasks, and the executor if it was not given
+
+            the calls still in the queue are cancelled
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            future.cancel()
+        if self.owned:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,82 @@
+""" runs the extractions described by a manifest
+
+    a manifest is a JSON file holding a list of jobs (or an object with
+    a "jobs" list), each job being an object with:
+     - "source": path to the image
+     - "grid": a list `[size, dest, a, b, c, d, rows]` as the entries
+       of `imagdapt.cases.locations` (or the name of one of them)
+     - "mode": one of "quad", "line" (default), "poly" or "persp"
+     - "target": the size `[w, h]` of the result (by default, the
+       `dest` of the grid)
+     - "engine": one of "pixel", "numpy" (default) or "pil"
+     - "output": path to the result (by default, "{n}.png" with `n` the
+       index of the job)
+
+    relative sources are relative to the manifest, relative outputs to
+    the output directory; see `python -m imagdapt extract --help`
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from imagdapt.cases import MODES, ENGINES, locations, makeGrid
+
+
+def load(fp, output="."):
+    """ loads the manifest `fp` (a path), returns its list of jobs
+
+        the paths of the jobs are resolved (see above), and every
+        missing key is set to its default
+    """
+    with open(fp) as f:
+        manifest = json.load(f)
+    if isinstance(manifest, dict):
+        manifest = manifest['jobs']
+
+    base = os.path.dirname(os.path.abspath(fp))
+    jobs = []
+    for n, job in enumerate(manifest):
+        grid = job['grid']
+        if isinstance(grid, str):
+            grid = locations[grid]
+        jobs.append({
+            'source': os.path.join(base, job['source']),
+            'grid': grid,
+            'mode': job.get('mode', "line"),
+            'target': tuple(job.get('target') or grid[1]),
+            'engine': job.get('engine', "numpy"),
+            'output': os.path.join(output, job.get('output', f"{n}.png"))
+        })
+    return jobs
+
+def runJob(job):
+    """ runs one job (see `load`), returns the path of its result
+
+        only the region of the source covered by the grid is decoded
+        (see `Grid.bind`)
+    """
+    grd = makeGrid(job['grid'])
+    if grd.bind(job['source'], job['target']) is None:
+        raise ValueError(f"Incomplete grid for {job['source']}.")
+
+    r = grd.extract(MODES[job['mode']], engine=ENGINES[job['engine']])
+    directory = os.path.dirname(job['output'])
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    r.save(job['output'])
+    return job['output']
+
+def run(jobs, workers=None):
+    """ runs the `jobs`, yields the path of each result in order
+
+        the jobs are spread across a pool of `workers` processes (by
+        default, as many as CPUs); `workers=0` runs them all in the
+        calling process
+    """
+    if workers == 0:
+        for job in jobs:
+            yield runJob(job)
+        return
+
+    with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+        yield from pool.map(runJob, jobs)
@@ -0,0 +1,172 @@
+""" benchmark with `"python -m imagdapt.bench [options]"`
+
+    sweeps the extraction over the test pictures (see `imagdapt.cases`)
+    for every mode, grid density, target size and transform, and
+    reports the pixels extracted per second and the peak memory
+
+    the results can be saved as JSON (`--save`) and compared against
+    previously saved ones (`--baseline`): the cases slower by more than
+    `--threshold` are reported as regressions, and the exit code is 1
+
+    the peak memory is the one traced by `tracemalloc` (which sees the
+    `numpy` arrays, but not the buffers allocated by Pillow)
+"""
+
+import imagdapt as iap
+import argparse
+import json
+import sys
+import tracemalloc
+from time import perf_counter_ns
+from imagdapt.cases import MODES, ENGINES, locations, makeGrid, picturePath
+
+
+def cases(names, modes, densities, scales, transforms, engines):
+    """ yields the description of every benchmarked case
+
+        each case is a `dict` with the keys 'case', 'mode', 'density',
+        'target', 'transform' and 'engine'; `densities` are grid sizes
+        (`None` for the one of the location) and `scales` are factors
+        of the target size of the location
+    """
+    for name in names:
+        dest = locations[name][1]
+        for mode in modes:
+            for density in densities:
+                for scale in scales:
+                    for transform in transforms:
+                        for engine in engines:
+                            yield {
+                                'case': name,
+                                'mode': mode,
+                                'density': density,
+                                'target': (
+                                    max(int(dest[0] * scale), 1),
+                                    max(int(dest[1] * scale), 1)
+                                ),
+                                'transform': transform,
+                                'engine': engine
+                            }
+
+def key(case):
+    """ returns the string identifying a case in the results
+    """
+    density = case['density']
+    return "{}/{}/{}/{}x{}/{}/{}".format(
+        case['case'], case['mode'],
+        "base" if density is None else "{}x{}".format(*density),
+        *case['target'],
+        "transform" if case['transform'] else "plain",
+        case['engine']
+    )
+
+def run(case, repeat=3):
+    """ benchmarks a case, returns its result as a `dict`
+
+        the first run is done with an empty `Remap` cache (so it
+        computes the geometry) and is traced for its peak memory; the
+        best of `repeat` more runs is then the warm time
+    """
+    grd = makeGrid(case['case'], case['density'])
+    grd.bind(iap.Util.openImage(picturePath(case['case'])), case['target'])
+    mode, engine = MODES[case['mode']], ENGINES[case['engine']]
+    transform = iap.Transform.invert() if case['transform'] else None
+
+    def extract():
+        begin = perf_counter_ns()
+        grd.extract(mode, transform, engine)
+        return perf_counter_ns() - begin
+
+    iap.Remap.cache.clear()
+    tracemalloc.start()
+    try:
+        cold = extract()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    warm = min(extract() for _ in range(repeat))
+
+    pixels = case['target'][0] * case['target'][1]
+    return {
+        **case,
+        'pixels': pixels,
+        'cold': cold / 1e9,
+        'warm': warm / 1e9,
+        'pixelsPerSecond': pixels / (warm / 1e9),
+        'peak': peak
+    }
+
+def compare(results, baseline, threshold=.1):
+    """ returns the regressions of `results` compared to `baseline`
+
+        both are lists of results (see `run`); a case regresses if its
+        pixels per second dropped by more than `threshold` (a ratio);
+        returns a list of `(key, before, after)` tuples
+    """
+    before = {key(r): r['pixelsPerSecond'] for r in baseline}
+    regressions = []
+    for r in results:
+        k = key(r)
+        if k in before and r['pixelsPerSecond'] < before[k] * (1 - threshold):
+            regressions.append((k, before[k], r['pixelsPerSecond']))
+    return regressions
+
+def parseSizes(text):
+    """ parses `"2x2,5x5"` into `[(2, 2), (5, 5)]` (`"base"` is `None`)
+    """
+    return [
+        None if it == "base" else tuple(int(v) for v in it.split("x"))
+        for it in text.split(",")
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m imagdapt.bench",
+        description="Benchmarks the extraction over the test pictures."
+    )
+    parser.add_argument('--cases', default=",".join(locations))
+    parser.add_argument('--modes', default="quad,line,poly")
+    parser.add_argument('--densities', default="base,5x5,9x9",
+                        help="grid sizes, 'base' for the location's own")
+    parser.add_argument('--scales', default="0.5,1,2",
+                        help="factors of the location's target size")
+    parser.add_argument('--engines', default="numpy")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help="saves the results to a JSON file")
+    parser.add_argument('--baseline', help="JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=.1)
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in cases(
+        args.cases.split(","),
+        args.modes.split(","),
+        parseSizes(args.densities),
+        [float(it) for it in args.scales.split(",")],
+        (False, True),
+        args.engines.split(",")
+    ):
+        r = run(case, args.repeat)
+        results.append(r)
+        print("{:<48} {:>10.1f} Mpx/s {:>10.1f} MiB".format(
+            key(r),
+            r['pixelsPerSecond'] / 1e6,
+            r['peak'] / (1 << 20)
+        ))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for k, before, after in regressions:
+            print(f"regression: {k} {before / 1e6:.1f} -> {after / 1e6:.1f} "
+                + "Mpx/s")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from threading import RLock
+
+class Cache:
+    """ a least-recently-used cache holding at most `budget` bytes
+
+        values are computed on a miss and kept until the total size
+        of the cached values goes over the budget, in which case the
+        least recently used ones are dropped
+
+        the `hits` and `misses` counters are updated by `Cache.get`,
+        the `evictions` counter by `Cache.evict`
+
+        a cache can be shared between threads: values are computed
+        outside of the lock, so a value may be computed twice when two
+        threads miss the same key at the same time
+    """
+    def __init__(self, budget=256 << 20, sizeOf=lambda value: value.nbytes):
+        self.budget = budget
+        self.sizeOf = sizeOf
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = OrderedDict()
+        self.lock = RLock()
+
+    def __repr__(self):
+        """ returns `"Cache({size}/{budget})"`
+        """
+        return f"Cache({self.size}/{self.budget})"
+
+    def __len__(self):
+        """ returns the number of cached values
+        """
+        return len(self.entries)
+
+    def __contains__(self, key):
+        """ returns `True` if a value is cached for `key`
+        """
+        return key in self.entries
+
+    def get(self, key, compute):
+        """ returns the value cached for `key`
+
+            on a miss, the value is obtained by calling `compute`
+            and is cached if it fits within the budget
+        """
+        value = self.find(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def find(self, key):
+        """ returns the value cached for `key`, or `None`
+
+            counts as a hit or a miss, like `Cache.get`
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits+= 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+            self.misses+= 1
+            return None
+
+    def put(self, key, value):
+        """ caches `value` for `key`, evicting as needed
+
+            a value larger than the whole budget is not cached
+        """
+        size = self.sizeOf(value)
+        with self.lock:
+            self.pop(key)
+            if size <= self.budget:
+                self.entries[key] = value
+                self.size+= size
+                self.evict()
+
+    def pop(self, key):
+        """ removes and returns the value cached for `key`, if any
+        """
+        with self.lock:
+            value = self.entries.pop(key, None)
+            if value is not None:
+                self.size-= self.sizeOf(value)
+            return value
+
+    def evict(self):
+        """ drops least recently used values until within budget
+        """
+        with self.lock:
+            while self.budget < self.size:
+                _, value = self.entries.popitem(last=False)
+                self.size-= self.sizeOf(value)
+                self.evictions+= 1
+
+    def setBudget(self, budget):
+        """ changes the budget, evicting values if needed
+        """
+        with self.lock:
+            self.budget = budget
+            self.evict()
+        return self
+
+    def clear(self):
+        """ drops every cached value and resets the counters
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = self.hits = self.misses = self.evictions = 0
+        return self
+
+    def stats(self):
+        """ returns a `dict` describing the state of the cache
+
+            keys are 'hits', 'misses', 'evictions', 'entries', 'size'
+            and 'budget'
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'size': self.size,
+                'budget': self.budget
+            }
@@ -0,0 +1,106 @@
+""" pre-calculated grids for the bundled test pictures
+
+    `locations` maps the name of a test (a folder of `imagdapt/test/`)
+    to the grid located on its picture, see `makeGrid`
+
+    `MODES` and `ENGINES` map the names used on the command line (see
+    `imagdapt.batch` and `imagdapt.bench`) to the extraction modes and
+    engines
+"""
+
+import imagdapt as iap
+import numpy as np
+import os
+
+
+MODES = {
+    'quad': iap.MODE_QUAD,
+    'line': iap.MODE_LINE,
+    'poly': iap.MODE_POLY,
+    'persp': iap.MODE_PERSP
+}
+ENGINES = {
+    'pixel': iap.ENGINE_PIXEL,
+    'numpy': iap.ENGINE_NUMPY,
+    'pil': iap.ENGINE_PIL
+}
+
+# maps pre-calculated locations for the available test pictures
+locations = { # size, dest, a, b, c, d, rows
+    "1": [
+        (2, 2), (800, 200),
+        (220, 90), (760, 128), (775, 380), (230, 300),
+        None
+    ],
+    "2": [
+        (2, 2), (800, 200),
+        (722, 555), (904, 523), (901, 562), (719, 596),
+        None
+    ],
+    "test": [
+        (2, 4), (800, 300),
+        (580, 446), (1004, 394), (999, 545), (581, 624),
+        { # `None`s in rows will be determine at runtime by `grd.complete`
+            'tops': None,
+            'rights': [ (1015, 433), None ],
+            'bottoms': None,
+            'lefts': [ (592, 503), None ]
+        }
+    ],
+    "test-full": [
+        (2, 2), (1200, 798),
+        (0, 0), (1200, 0), (1200, 798), (0, 798),
+        None
+    ]
+}
+
+
+def picturePath(name):
+    """ returns the path of the picture of the test `name`
+    """
+    return os.path.join(os.path.dirname(__file__), 'test', name, 'picture.jpg')
+
+def makeGrid(location, density=None):
+    """ returns the completed grid described by a `locations` entry
+
+        `location` is a list `[size, dest, a, b, c, d, rows]` as in
+        `locations` (or the name of one of its tests); if `density`
+        `(w, h)` is given, the grid is resampled to that many points
+        (the new points are on the cells of the original grid)
+    """
+    if isinstance(location, str):
+        location = locations[location]
+    size, dest, a, b, c, d, rows = location
+
+    grd = iap.Grid(
+        size[0], size[1],
+        topLeft=iap.Point(a),
+        topRight=iap.Point(b),
+        bottomRight=iap.Point(c),
+        bottomLeft=iap.Point(d)
+    )
+    if rows:
+        p = lambda l: (l if l is None else
+                       [it if it is None else iap.Point(it) for it in l])
+        grd.setRows(
+            p(rows.get('tops')),
+            p(rows.get('rights')),
+            p(rows.get('bottoms')),
+            p(rows.get('lefts'))
+        )
+    grd.complete(rows=True, fill=True)
+
+    if density is None or tuple(density) == (grd.w, grd.h):
+        return grd
+
+    w, h = density
+    dense = iap.Grid(w, h)
+    array = grd.array
+    for axis, n in (0, w), (1, h):
+        at = np.linspace(0, array.shape[axis] - 1, n)
+        array = np.apply_along_axis(
+            lambda v: np.interp(at, np.arange(len(v)), v),
+            axis, array
+        )
+    dense.array[...] = array
+    return dense
@@ -1,16 +1,167 @@
 import imagdapt as iap
-from PIL import Image
+import numpy as np
+import os
+from PIL import Image, ImageDraw
 
 class Util:
     """ static util class
+
+        `Util.sources` is the cache of decoded images used by
+        `Util.openImage`, it is `None` (disabled) by default; see
+        `Util.cacheSources`
     """
+    sources = None
+
     @staticmethod
     def openImage(fp, mode='r', **kw):
         """ opens and returns an image
 
-            this function simply calls `Image.open`
+            this function simply calls `Image.open`; see also
+            `Util.openRegion`
+
+            when the cache is enabled (see `Util.cacheSources`) and
+            `fp` is a path, the image is decoded once, at full scale,
+            and kept in the cache (see `Util.sourceKey`); a copy of the
+            cached image is returned, which costs a copy of its pixels
+            on every hit
+        """
+        if Util.sources is None or mode != 'r' or kw:
+            return Image.open(fp, mode, **kw)
+        key = Util.sourceKey(fp)
+        if key is None:
+            return Image.open(fp, mode)
+        return Util.sources.get(key, lambda: Util.decodeImage(fp)).copy()
+
+    @staticmethod
+    def sourceKey(fp, reduce=1):
+        """ returns the key of an image file in `Util.sources`
+
+            the key is made of the path, modification time and size of
+            the file, and of the `reduce` factor it is decoded with
+            (see `Util.decodeImage`); `None` if `fp` is not a path
+        """
+        try:
+            stat = os.stat(fp)
+        except TypeError:
+            return None
+        return os.path.realpath(fp), stat.st_mtime_ns, stat.st_size, reduce
+
+    @staticmethod
+    def decodeImage(fp, reduce=1, box=None):
+        """ opens and fully decodes an image, closing the file
+
+            with a `reduce` factor of 2, 4 or 8, JPEG images are
+            decoded at that reduced scale (see `Image.draft`); the
+            scale actually used (1 for other images) is recorded as
+            `image.info['scale']`
+
+            if `box` is given (in the coordinates of the full image),
+            only the part of the image covering it is kept (see
+            `Util.scaledBox`), cropped before the file is closed
+        """
+        with Image.open(fp) as image:
+            w, h = image.size
+            scale = 1
+            if 2 <= reduce:
+                drafted = image.draft(image.mode, (w // reduce, h // reduce))
+                if drafted is not None:
+                    scale = w / drafted[1][2]
+            if box is None:
+                image.load()
+            else:
+                image = image.crop(Util.scaledBox(box, scale, image.size))
+        image.info['scale'] = scale
+        return image
+
+    @staticmethod
+    def scaledBox(box, scale, size):
+        """ returns the part of an image decoded at `scale` covering `box`
+
+            `box` is `(left, top, right, bottom)` in the coordinates of
+            the full image; the returned box is in those of the image
+            of the given (reduced) `size`, rounded outward and clipped
+        """
+        left, top, right, bottom = box
+        return (
+            max(int(left // scale), 0),
+            max(int(top // scale), 0),
+            min(int(-(-right // scale)) + 1, size[0]),
+            min(int(-(-bottom // scale)) + 1, size[1])
+        )
+
+    @staticmethod
+    def imageBytes(image):
+        """ returns the size of the decoded pixels of an image, in bytes
         """
-        return Image.open(fp, mode, **kw)
+        depth = 4 if image.mode in ('I', 'F') else 1
+        if image.mode.startswith('I;16'):
+            depth = 2
+        return image.width * image.height * len(image.getbands()) * depth
+
+    @staticmethod
+    def cacheSources(budget=256 << 20):
+        """ enables the cache of decoded images used by `Util.openImage`
+
+            `budget` is the maximum size of the cached pixels in bytes;
+            with `None`, the cache is disabled and dropped
+
+            images opened with `Util.openImage` are cached at full
+            scale, those opened with `Util.openRegion` at the scale
+            they are decoded with
+
+            returns the cache (a `Cache`), whose statistics are given
+            by `Cache.stats`
+        """
+        if budget is None:
+            Util.sources = None
+        elif Util.sources is None:
+            Util.sources = iap.Cache(budget, Util.imageBytes)
+        else:
+            Util.sources.setBudget(budget)
+        return Util.sources
+
+    @staticmethod
+    def openRegion(fp, box=None, reduce=1, margin=16):
+        """ opens only a region of an image, at a reduced scale
+
+            `box` is the region `(left, top, right, bottom)` needed
+            from the image (extended by `margin` pixels on each side);
+            `reduce` is the factor by which the image can be reduced,
+            which is used for JPEG images to decode them at 1/2, 1/4 or
+            1/8 of their size (see `Util.decodeImage`)
+
+            when the cache is enabled (see `Util.cacheSources`), the
+            image is decoded at that reduced scale and cached under a
+            key which includes the scale, so that the reduced decoding
+            is kept; only the region is copied out of the cache;
+            otherwise, the region is cropped as the image is decoded
+            and nothing else is kept
+
+            returns a tuple `(image, frame)` where `frame` is
+            `(x, y, scale)`: the pixel at `(i, j)` in the returned
+            image is the one at `(x + i * scale, y + j * scale)` in the
+            full image
+        """
+        k = 2 ** min(int(reduce).bit_length() - 1, 3) if 2 <= reduce else 1
+        if box is not None:
+            left, top, right, bottom = box
+            box = left - margin, top - margin, right + margin, bottom + margin
+
+        key = None if Util.sources is None else Util.sourceKey(fp, k)
+        if key is None:
+            image = Util.decodeImage(fp, k, box)
+        else:
+            image = Util.sources.get(key, lambda: Util.decodeImage(fp, k))
+            image = image.copy() if box is None else image.crop(
+                Util.scaledBox(box, image.info['scale'], image.size)
+            )
+        scale = image.info['scale']
+
+        x = y = 0
+        if box is not None:
+            x, y = (max(int(v // scale), 0) * scale for v in box[:2])
+
+        return image, (x, y, scale)
 
     @staticmethod
     def newImage(mode, size, color=0, **kw):
@@ -20,6 +171,133 @@ class Util:
         """
         return Image.new(mode, size, color, **kw)
 
+    @staticmethod
+    def toArray(image):
+        """ returns the pixels of an image as a `numpy` array
+
+            the array is of shape `(h, w)` or `(h, w, channels)`; an
+            image which already is an array is returned as is
+        """
+        return np.asarray(image)
+
+    @staticmethod
+    def fromArray(array, like):
+        """ creates and returns an image from an array of pixels
+
+            the new image has the mode (and palette, if any) of the
+            `like` image; this is the reverse of `Util.toArray`
+
+            if `like` is an array and not an image, `array` is
+            returned as is
+        """
+        if not isinstance(like, Image.Image):
+            return array
+        result = Image.fromarray(array)
+        if result.mode != like.mode:
+            result = Image.frombytes(like.mode, result.size, array.tobytes())
+        if like.mode == 'P':
+            result.putpalette(like.getpalette())
+        return result
+
+    @staticmethod
+    def asSource(image):
+        """ returns `image` as it can be bound to a grid
+
+            a `PIL.Image` is returned as is; anything else (an array or
+            an object supporting the buffer protocol, of shape `(h, w)`
+            or `(h, w, channels)`) is returned as a `numpy` array,
+            without copying it unless it is not C-contiguous
+        """
+        if isinstance(image, Image.Image):
+            return image
+        array = np.ascontiguousarray(image)
+        if array.ndim not in (2, 3):
+            raise ValueError(f"Cannot bind an array of shape {array.shape}, "
+                + "expected (h, w) or (h, w, channels).")
+        return array
+
+    @staticmethod
+    def imageSize(image):
+        """ returns the size `(w, h)` of an image or of an array
+        """
+        if isinstance(image, Image.Image):
+            return image.size
+        return image.shape[1], image.shape[0]
+
+    @staticmethod
+    def pixelType(image):
+        """ returns the shape and type of a pixel of an image
+
+            this is `((), dtype)` or `((channels,), dtype)`, as in the
+            array returned by `Util.toArray`
+        """
+        if isinstance(image, Image.Image):
+            image = Util.toArray(image.crop((0, 0, 1, 1)))
+        return image.shape[2:], image.dtype
+
+    @staticmethod
+    def reduce(image, size):
+        """ reduces an image (or an array) to `size` with a box filter
+
+            each pixel of the result is the mean of the pixels it
+            covers (for palette and bilevel images, the nearest one is
+            taken instead)
+        """
+        if not Util.isImage(image):
+            return Util.toArray(Util.reduce(Image.fromarray(image), size))
+        if tuple(size) == image.size:
+            return image.copy()
+        filter = Image.NEAREST if image.mode in ('1', 'P') else Image.BOX
+        return image.resize(tuple(size), filter)
+
+    @staticmethod
+    def isImage(image):
+        """ returns `True` if `image` is a `PIL.Image`
+        """
+        return isinstance(image, Image.Image)
+
+    @staticmethod
+    def toBuffer(out, size, like, at=None):
+        """ returns `out` as an array for a result of `size` from `like`
+
+            `out` is an array or a writable object supporting the buffer
+            protocol; it is viewed (not copied) as an array of shape
+            `(h, w)` or `(h, w, channels)` and of the type of the pixels
+            of the `like` image (see `Util.pixelType`); only untyped
+            buffers (bytes) are reinterpreted to that type, a typed
+            array must already be of it
+
+            if `at` is given, `out` must be an array (or a buffer with a
+            shape) larger than the result, and the returned array is
+            the view of the `size` rectangle starting at `at = (x, y)`
+        """
+        pixel, dtype = Util.pixelType(like)
+        w, h = size
+        raw = isinstance(out, (bytes, bytearray)) or (
+            isinstance(out, memoryview) and out.format in ('B', 'b', 'c')
+        )
+        array = np.asarray(out)
+        if array.dtype != dtype:
+            if not raw:
+                raise ValueError(f"Cannot write {dtype} pixels to a buffer "
+                    + f"of {array.dtype}.")
+            array = array.reshape(-1).view(dtype)
+        if at is not None:
+            x, y = at
+            H, W = array.shape[:2]
+            if (array.shape[2:] != pixel or x < 0 or y < 0
+                    or W < x + w or H < y + h):
+                raise ValueError(f"Cannot fit a {size} result at {at} "
+                    + f"in a buffer of shape {array.shape}.")
+            array = array[y:y + h, x:x + w]
+        elif array.shape != (h, w, *pixel):
+            if not array.flags.c_contiguous:
+                raise ValueError("Cannot reshape a non-contiguous buffer.")
+            array = array.reshape(h, w, *pixel)
+        if not array.flags.writeable:
+            raise ValueError("Cannot write the result to a read-only buffer.")
+        return array
+
 class Extractor:
     @staticmethod
     def getPixel(image, x, y, transform=None):
@@ -32,6 +310,7 @@ class Extractor:
     def extractQuadrilateral(grid, additionalPixelTransform=None):
         """ extraction algorithm for the `MODE_QUAD` mode
         """
+        grid = grid.framed()
         r = []
 
         w_, h_ = grid.target
@@ -74,6 +353,7 @@ class Extractor:
     def extractLinear(grid, additionalPixelTransform=None):
         """ extraction algorithm for the `MODE_LINE` mode
         """
+        grid = grid.framed()
         r = []
 
         w_, h_ = grid.target
@@ -125,43 +405,76 @@ class Extractor:
 
     @staticmethod
     def extractPolynomial(grid, additionalPixelTransform=None):
-        """ (TODO) extraction algorithm for the `MODE_POLY` mode
+        """ extraction algorithm for the `MODE_POLY` mode
+
+            there is no pixel by pixel version of this mode, the
+            surface is always evaluated with arrays (see
+            `VectorExtractor.extractPolynomial`)
         """
-        r = []
+        return iap.VectorExtractor.extractPolynomial(
+            grid,
+            additionalPixelTransform
+        )
 
-        result = Util.newImage(grid.image.mode, grid.target)
-        result.putdata(r)
-        return result
+    @staticmethod
+    def extractPerspective(grid, additionalPixelTransform=None):
+        """ extraction algorithm for the `MODE_PERSP` mode
+
+            there is no pixel by pixel version of this mode, the
+            homographies are always solved and applied with arrays
+            (see `VectorExtractor.extractPerspective`)
+        """
+        return iap.VectorExtractor.extractPerspective(
+            grid,
+            additionalPixelTransform
+        )
 
     @staticmethod
-    def masked(srcImg, srcA, srcB, srcC, srcD, maskColor=(0,0,0)):
-        """ (unused - TODO: keep and adapt or remove because useless?)
+    def masked(srcImg, srcA=None, srcB=None, srcC=None, srcD=None,
+               maskColor=(0,0,0)):
+        """ returns the image with only a part of it visible
 
             this function returns an image where only the part within
             the quadrilateral defined by `srcA`, `srcB` `srcC` and
             `srcD` from the `srcImg` is visible; the exterior is
-            replaced with the `maskColor` (an RGB-tuple pixel)
-        """
-        r = []
-
-        w, h = srcImg.size
+            replaced with the `maskColor` (a pixel of the image's mode,
+            e.g. an RGB-tuple)
 
-        x, y = srcA
-        s, t = srcC
-        px = lambda i: max(min((x - i) / (x - s), 1), 0)
-        py = lambda j: max(min((y - j) / (y - t), 1), 0)
+            `srcImg` can also be a bound grid, in which case the part
+            is the shape of the whole grid (see `Grid.getPlotShape`)
+            in its bound image (or array, see `Grid.bind`)
 
-        mx = lambda p: (1 - p) * srcA[0] + p * srcD[0]
-        Mx = lambda p: (1 - p) * srcB[0] + p * srcC[0]
-        my = lambda p: (1 - p) * srcA[1] + p * srcB[1]
-        My = lambda p: (1 - p) * srcD[1] + p * srcC[1]
-
-        isinside = lambda i, j: mx(py(j)) < i and i < Mx(py(j)) and my(px(i)) < j and j < My(px(i))
-
-        for j in range(h):
-            for i in range(w):
-                r.append(srcImg.getpixel((i, j)) if isinside(i, j) else maskColor)
-
-        img = Util.newImage(srcImg.mode, srcImg.size)
-        img.putdata(r)
-        return img
+            the shape is rasterized on its bounding box only, outside
+            of which the result is simply filled
+        """
+        if isinstance(srcImg, iap.Grid):
+            X, Y = srcImg.framed().getPlotShape()
+            shape = list(zip(X, Y))
+            srcImg = srcImg.image
+        else:
+            shape = [srcA, srcB, srcC, srcD]
+
+        w, h = Util.imageSize(srcImg)
+        pixel, dtype = Util.pixelType(srcImg)
+        r = np.empty((h, w, *pixel), dtype)
+        r[...] = maskColor
+
+        left = max(int(np.floor(min(x for x, _ in shape))), 0)
+        top = max(int(np.floor(min(y for _, y in shape))), 0)
+        right = min(int(np.ceil(max(x for x, _ in shape))) + 1, w)
+        bottom = min(int(np.ceil(max(y for _, y in shape))) + 1, h)
+
+        if left < right and top < bottom:
+            mask = Util.newImage('1', (right - left, bottom - top))
+            ImageDraw.Draw(mask).polygon(
+                [(x - left, y - top) for x, y in shape],
+                fill=1
+            )
+            mask = Util.toArray(mask)
+            if Util.isImage(srcImg):
+                region = Util.toArray(srcImg.crop((left, top, right, bottom)))
+            else:
+                region = srcImg[top:bottom, left:right]
+            r[top:bottom, left:right][mask] = region[mask]
+
+        return Util.fromArray(r, srcImg)
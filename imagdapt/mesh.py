@@ -0,0 +1,144 @@
+import imagdapt as iap
+from PIL import Image
+
+class MeshExtractor:
+    """ static class of extraction algorithms delegating to Pillow
+
+        the grid is turned into the data of an `Image.transform` call
+        (`Image.QUAD` or `Image.MESH`), so that the sampling is done
+        in C with the chosen `resample` filter (`Image.NEAREST`,
+        `Image.BILINEAR` or `Image.BICUBIC`)
+
+        Pillow maps each quadrilateral bilinearly and samples at the
+        center of pixels, hence the results are close to but not
+        exactly the same as with the `Extractor` class
+    """
+    @staticmethod
+    def edges(n, size):
+        """ returns the first pixel of each of the `n` cells of a row
+
+            a row of `size` pixels is split as in
+            `Extractor.extractLinear` (pixel `i` belongs to the cell
+            `int(i / (size / n))`); the list ends with `size`
+        """
+        s = size / n
+        r = [0]
+        for i in range(1, size):
+            if int(i / s) != int((i - 1) / s):
+                r.append(i)
+        r.append(size)
+        return r
+
+    @staticmethod
+    def quad(a, b, c, d, s0, t0, s1, t1):
+        """ returns the quad data of the sub-part of a cell
+
+            the cell of corners `a`, `b`, `c`, `d` (clockwise from top
+            left) is mapped bilinearly; the sub-part spans `s0` to `s1`
+            horizontally and `t0` to `t1` vertically (in cell units)
+
+            the data is ordered as expected by `Image.QUAD`: upper
+            left, lower left, lower right and upper right corners
+        """
+        def at(s, t):
+            top = iap.Point.between(a, b, s)
+            bottom = iap.Point.between(d, c, s)
+            return iap.Point.between(top, bottom, t).get()
+
+        return (*at(s0, t0), *at(s0, t1), *at(s1, t1), *at(s1, t0))
+
+    @staticmethod
+    def finish(result, transform):
+        """ applies a per-pixel `transform` function, if any
+
+            see `VectorExtractor.transformArray`
+        """
+        if transform is None:
+            return result
+        return iap.Util.fromArray(
+            iap.VectorExtractor.transformArray(
+                iap.Util.toArray(result),
+                transform, result
+            ),
+            result
+        )
+
+    @staticmethod
+    def extractQuadrilateral(grid, additionalPixelTransform=None,
+                             resample=Image.NEAREST):
+        """ extraction algorithm for the `MODE_QUAD` mode
+
+            uses `Image.transform` with `Image.QUAD`
+        """
+        grid = grid.framed()
+        a, b = grid[0, 0], grid[-1, 0]
+        d, c = grid[0, -1], grid[-1, -1]
+
+        result = grid.image.transform(
+            tuple(grid.target), Image.QUAD,
+            MeshExtractor.quad(a, b, c, d, 0, 0, 1, 1),
+            resample
+        )
+        return MeshExtractor.finish(result, additionalPixelTransform)
+
+    @staticmethod
+    def extractLinear(grid, additionalPixelTransform=None,
+                      resample=Image.NEAREST):
+        """ extraction algorithm for the `MODE_LINE` mode
+
+            uses `Image.transform` with `Image.MESH`, made of one quad
+            per cell, laid out as in `Extractor.extractLinear`
+        """
+        grid = grid.framed()
+        w_, h_ = grid.target
+        w, h = grid.w - 1, grid.h - 1
+        w__, h__ = w_ / w, h_ / h
+
+        X = MeshExtractor.edges(w, w_)
+        Y = MeshExtractor.edges(h, h_)
+
+        mesh = []
+        for i in range(w):
+            for j in range(h):
+                a, b = grid[i, j], grid[i + 1, j]
+                d, c = grid[i, j + 1], grid[i + 1, j + 1]
+                mesh.append(((X[i], Y[j], X[i + 1], Y[j + 1]),
+                    MeshExtractor.quad(
+                        a, b, c, d,
+                        X[i] / w__ - i, Y[j] / h__ - j,
+                        X[i + 1] / w__ - i, Y[j + 1] / h__ - j
+                    )
+                ))
+
+        result = grid.image.transform(
+            tuple(grid.target), Image.MESH,
+            mesh,
+            resample
+        )
+        return MeshExtractor.finish(result, additionalPixelTransform)
+
+    @staticmethod
+    def extractPolynomial(grid, additionalPixelTransform=None,
+                          resample=Image.NEAREST):
+        """ extraction algorithm for the `MODE_POLY` mode
+
+            not supported by Pillow, uses
+            `VectorExtractor.extractPolynomial` (`resample` is ignored)
+        """
+        return iap.VectorExtractor.extractPolynomial(
+            grid,
+            additionalPixelTransform
+        )
+
+    @staticmethod
+    def extractPerspective(grid, additionalPixelTransform=None,
+                           resample=Image.NEAREST):
+        """ extraction algorithm for the `MODE_PERSP` mode
+
+            not supported by Pillow, uses
+            `VectorExtractor.extractPerspective` (`resample` is ignored)
+        """
+        return iap.VectorExtractor.extractPerspective(
+            grid,
+            additionalPixelTransform
+        )
@@ -0,0 +1,111 @@
+import math
+from threading import Lock
+
+class Profile:
+    """ a profiling sink aggregating the events of each phase
+
+        install it with `imagdapt.addSink` (and uninstall it with
+        `imagdapt.removeSink`); it keeps the time of every event per
+        phase, along with the number of pixels processed, from which
+        `Profile.stats` gives percentiles and `Profile.histogram` a
+        histogram
+    """
+    def __init__(self):
+        self.times = {}
+        self.pixels = {}
+        self.lock = Lock()
+
+    def __repr__(self):
+        """ returns `"Profile({count} events)"`
+        """
+        return f"Profile({sum(map(len, self.times.values()))} events)"
+
+    def __call__(self, event):
+        """ records an event (see `imagdapt.phase`)
+        """
+        name, pixels = event['phase'], event.get('pixels', 0)
+        with self.lock:
+            self.times.setdefault(name, []).append(event['time'])
+            self.pixels[name] = self.pixels.get(name, 0) + pixels
+
+    def percentile(self, name, q):
+        """ returns the `q`-th percentile (0 to 100) of a phase's times
+
+            in nanoseconds (nearest rank), `None` if there is no event
+        """
+        with self.lock:
+            times = sorted(self.times.get(name, ()))
+        return Profile.rank(times, q)
+
+    @staticmethod
+    def rank(times, q):
+        """ returns the `q`-th percentile of sorted `times`, or `None`
+        """
+        if not times:
+            return None
+        return times[max(math.ceil(q / 100 * len(times)) - 1, 0)]
+
+    def histogram(self, name):
+        """ returns the histogram of a phase's times
+
+            the bins are powers of 2 nanoseconds, the histogram is a
+            `dict` mapping the upper bound of each non-empty bin to the
+            number of events in it
+        """
+        r = {}
+        with self.lock:
+            times = list(self.times.get(name, ()))
+        for time in times:
+            bound = 1 << max(time, 1).bit_length()
+            r[bound] = r.get(bound, 0) + 1
+        return dict(sorted(r.items()))
+
+    def stats(self):
+        """ returns a `dict` describing every phase
+
+            for each phase, a `dict` with the keys 'count', 'total',
+            'mean', 'p50', 'p90', 'p99', 'max' (in nanoseconds) and
+            'pixels' (total number of pixels processed)
+        """
+        with self.lock:
+            phases = [
+                (name, sorted(times), self.pixels[name])
+                for name, times in self.times.items()
+            ]
+        r = {}
+        for name, times, pixels in phases:
+            total = sum(times)
+            r[name] = {
+                'count': len(times),
+                'total': total,
+                'mean': total / len(times),
+                'p50': Profile.rank(times, 50),
+                'p90': Profile.rank(times, 90),
+                'p99': Profile.rank(times, 99),
+                'max': times[-1],
+                'pixels': pixels
+            }
+        return r
+
+    def report(self):
+        """ returns the stats as a table, in milliseconds
+        """
+        lines = ["{:<10} {:>7} {:>10} {:>10} {:>10} {:>10}".format(
+            "phase", "count", "total", "p50", "p90", "p99"
+        )]
+        for name, stats in self.stats().items():
+            lines.append(
+                "{:<10} {:>7} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                    name, stats['count'],
+                    *(stats[k] / 1e6 for k in ('total', 'p50', 'p90', 'p99'))
+                )
+            )
+        return "\n".join(lines)
+
+    def clear(self):
+        """ drops every recorded event
+        """
+        with self.lock:
+            self.times.clear()
+            self.pixels.clear()
+        return self
@@ -0,0 +1,159 @@
+import imagdapt as iap
+import numpy as np
+import struct
+
+class Remap:
+    """ a `Remap` is a compiled extraction
+
+        it holds, for every pixel of the result, the flat index of the
+        source pixel it is sampled from; applying it to an image is
+        then a single gather
+
+        compiled remaps are kept in `Remap.cache` (a `Cache`) under a
+        key made from the grid's points, the mode, the target size
+        and the source size; the budget of this cache can be changed
+        with `Remap.cache.setBudget`
+
+        a remap can be saved to a file with `Remap.save` and loaded
+        back with `Remap.load`; the file is made of a 32-byte header
+        followed by the raw index table (little-endian, C order):
+        ```
+            magic    8s  b"IAPREMAP"
+            version  H   1
+            mode     h   extraction mode
+            itemsize I   4 or 8 (int32 or int64 indices)
+            target   2I  w, h
+            source   2I  w, h
+        ```
+        loading maps the table in memory, so that processes loading
+        the same file share it; a loaded remap is pickled as its path
+        only, so sending it to another process loads it there again
+    """
+    cache = iap.Cache(64 << 20)
+
+    HEADER = struct.Struct("<8sHhI2I2I")
+    MAGIC = b"IAPREMAP"
+    VERSION = 1
+
+    def __init__(self, index, mode, source, path=None):
+        self.index = index
+        self.mode = mode
+        self.source = tuple(source)
+        self.target = index.shape[1], index.shape[0]
+        self.path = path
+
+    def __reduce__(self):
+        """ pickles a loaded remap as its path (see `Remap.load`)
+        """
+        if self.path is not None:
+            return Remap.load, (self.path,)
+        return Remap, (self.index, self.mode, self.source)
+
+    def __repr__(self):
+        """ returns `"Remap({w}x{h} <- {w}x{h})"`
+        """
+        return "Remap({}x{} <- {}x{})".format(*self.target, *self.source)
+
+    @property
+    def nbytes(self):
+        """ memory used by the index table, in bytes
+        """
+        return self.index.nbytes
+
+    @staticmethod
+    def key(grid, mode):
+        """ returns the key identifying the compilation of a grid
+
+            the key changes with any of the grid's points, the mode,
+            the target size, the size of the bound image and its frame
+            (see `Grid.setFrame`)
+        """
+        return (
+            mode,
+            tuple(grid.target),
+            tuple(iap.Util.imageSize(grid.image)),
+            grid.w, grid.h,
+            grid.array.tobytes(),
+            grid.frame
+        )
+
+    @staticmethod
+    def compile(grid, mode):
+        """ compiles a bound grid for the given mode into a `Remap`
+        """
+        size = iap.Util.imageSize(grid.image)
+        w_, h_ = grid.target
+
+        def build():
+            X, Y = iap.VectorExtractor.map(grid, mode)
+            index = iap.VectorExtractor.index(X, Y, size)
+            return Remap(index, mode, size)
+
+        return iap.phase('remap', build, mode=mode, pixels=w_ * h_)
+
+    @staticmethod
+    def get(grid, mode):
+        """ returns the `Remap` of a bound grid, from cache if possible
+
+            see `Remap.compile`
+        """
+        return Remap.cache.get(
+            Remap.key(grid, mode),
+            lambda: Remap.compile(grid, mode)
+        )
+
+    def save(self, fp):
+        """ saves this remap to the file `fp` (a path)
+
+            see `Remap` for the format
+        """
+        index = self.index.astype(self.index.dtype.newbyteorder('<'))
+        with open(fp, 'wb') as f:
+            f.write(Remap.HEADER.pack(
+                Remap.MAGIC, Remap.VERSION,
+                self.mode, index.itemsize,
+                *self.target, *self.source
+            ))
+            f.write(np.ascontiguousarray(index).tobytes())
+        return self
+
+    @staticmethod
+    def load(fp):
+        """ loads a remap from the file `fp` (a path)
+
+            the index table is not read but mapped in memory, see
+            `numpy.memmap`
+        """
+        with open(fp, 'rb') as f:
+            header = f.read(Remap.HEADER.size)
+
+        if len(header) != Remap.HEADER.size:
+            raise ValueError(f"Not a remap file: {fp}.")
+        magic, version, mode, itemsize, w, h, sw, sh = (
+            Remap.HEADER.unpack(header)
+        )
+        if magic != Remap.MAGIC or version != Remap.VERSION:
+            raise ValueError(f"Not a remap file (or unknown version): {fp}.")
+
+        index = np.memmap(
+            fp, dtype=f"<i{itemsize}", mode='r',
+            offset=Remap.HEADER.size, shape=(h, w)
+        )
+        return Remap(index, mode, (sw, sh), fp)
+
+    def apply(self, image, transform=None, out=None):
+        """ extracts from `image` using this remap
+
+            the image (or array) must be of the size the remap was
+            compiled for (see `VectorExtractor.gather` for `transform`
+            and `out`)
+        """
+        size = tuple(iap.Util.imageSize(image))
+        if size != self.source:
+            raise ValueError(f"Remap compiled for a {self.source} image, "
+                + f"cannot be applied to a {size} image.")
+        return iap.VectorExtractor.gather(
+            image, self.index,
+            transform, out=out,
+            mode=self.mode
+        )
@@ -1,13 +1,51 @@
 import imagdapt as iap
+import numpy as np
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from multiprocessing.shared_memory import SharedMemory
 
 class Point:
     """ a `Point` holds 2 coordinates `x` and `y`
+
+        the points of a `Grid` are views on its array: reading or
+        writing their coordinates reads or writes the grid's array
+        (see `Point.view`)
     """
+    __slots__ = ('xy',)
+
     def __init__(self, x=0, y=0):
         if isinstance(x, (tuple, list)):
             x, y = x
-        self.x = x
-        self.y = y
+        self.xy = [x, y]
+
+    @staticmethod
+    def view(xy):
+        """ returns a `Point` whose coordinates are stored in `xy`
+
+            `xy` is a mutable sequence of 2 values, e.g. a row of an
+            array of coordinates
+        """
+        point = Point.__new__(Point)
+        point.xy = xy
+        return point
+
+    @property
+    def x(self):
+        return self.xy[0]
+
+    @x.setter
+    def x(self, value):
+        self.xy[0] = value
+
+    @property
+    def y(self):
+        return self.xy[1]
+
+    @y.setter
+    def y(self, value):
+        self.xy[1] = value
 
     def __repr__(self):
         """ returns `"Point({x}, {y})"`
@@ -98,6 +136,44 @@ class Point:
         t = tmp1.x * tmp2.y - tmp1.y * tmp2.x
         return Point(a.x + t * (b.x - a.x), a.y + t * (b.y - a.y))
 
+class Column:
+    """ a `Column` is a column of the points of a `Grid`
+
+        it is a view on the grid: getting and setting its points is
+        the same as with `Grid.__getitem__` and `Grid.__setitem__`
+    """
+    __slots__ = ('grid', 'i')
+
+    def __init__(self, grid, i):
+        self.grid = grid
+        self.i = i
+
+    def __repr__(self):
+        """ returns the points of the column, as a list
+        """
+        return repr(list(self))
+
+    def __len__(self):
+        """ returns the number of points, i.e. the height of the grid
+        """
+        return self.grid.h
+
+    def __getitem__(self, j):
+        """ gets the point at `j` (or a list of points for a slice)
+        """
+        if isinstance(j, slice):
+            return [self[k] for k in range(*j.indices(self.grid.h))]
+        if not -self.grid.h <= j < self.grid.h:
+            raise IndexError("column index out of range")
+        return self.grid[self.i, j]
+
+    def __setitem__(self, j, value):
+        """ sets the point at `j`, see `Grid.__setitem__`
+        """
+        if not -self.grid.h <= j < self.grid.h:
+            raise IndexError("column index out of range")
+        self.grid[self.i, j] = value
+
 class Grid:
     """ a `Grid` defines a 2-dimentional array of `Point`s
 
@@ -106,6 +182,9 @@ class Grid:
         a new `Grid` can be provided with all 4 corners as kwargs:
         'topRight', 'topLeft', 'bottomRight' and 'bottomLeft'; they
         must be instances of `Point` (and cannot be `None`)
+
+        the coordinates are stored in the `array` attribute, a `numpy`
+        array of shape `(w, h, 2)` where missing points are `NaN`s
     """
     def __init__(self, w=2, h=None, **corners):
         self.w = w
@@ -115,7 +194,11 @@ class Grid:
             raise IndexError(f"Invalid grid size of {w}x{h}: "
                 + "the minimal size for a grid is 2x2.")
 
-        self.points = [[None for k in range(self.h)] for k in range(self.w)]
+        self.array = np.full((self.w, self.h, 2), np.nan)
+        self.remap = None
+        self.dirty = set()
+        self.previous = None
+        self.frame = None
         if corners:
             self.setCorners(
                 corners['topLeft'],
@@ -147,6 +230,17 @@ class Grid:
 
         return f"{self.w}x{self.h}: [\n\t[ {grid} ]\n]"
 
+    @property
+    def points(self):
+        """ the points of the grid as a tuple of columns
+
+            the columns are views on the grid (see `Column`), so that
+            `grid.points[i][j] = point` is the same as `grid[i, j] =
+            point`; the points are views on the grid's array (see
+            `Point.view`), missing points are `None`
+        """
+        return tuple(Column(self, i) for i in range(self.w))
+
     def __getitem__(self, ij=None):
         """ gets the point at (i, j) with `i, j = ij`
 
@@ -158,18 +252,32 @@ class Grid:
                 print(grid[i, j])
                 print(grid[i][j])
             ```
+
+            the returned points are views on the grid's array, or
+            `None` where the point is missing; likewise, the column is
+            a view on the grid (see `Column`), and `grid[i][j] = point`
+            is the same as `grid[i, j] = point`
         """
         if ij is None:
             return self.points
         if isinstance(ij, int):
-            return self.points[ij]
-        return self.points if ij is None else self.points[ij[0]][ij[1]]
+            if not -self.w <= ij < self.w:
+                raise IndexError("grid index out of range")
+            return Column(self, ij % self.w)
+        xy = self.array[ij[0], ij[1]]
+        return None if np.isnan(xy[0]) else Point.view(xy)
 
     def __setitem__(self, ij=None, value=None):
         """ sets `value` at (i, j), with `i, j = ij`
 
             if `ij` is `None` and `value` is a table the same size
             as the gide, updates the entire grid with the given points
+
+            the coordinates of the points are copied into the grid's
+            array; setting `None` removes a point
+
+            the point is marked as dirty, see `Grid.extractIncremental`
+            (moving a point through its view is not tracked)
         """
         if ij is None:
             if len(value) != self.w or len(value[0]) != self.h:
@@ -179,9 +287,13 @@ class Grid:
                 )
             for i in range(self.w):
                 for j in range(self.h):
-                    self.points[i][j] = Point.assertIsPoint(value[i][j])
+                    self[i, j] = value[i][j]
         else:
-            self.points[ij[0]][ij[1]] = Point.assertIsPoint(value)
+            value = Point.assertIsPoint(value)
+            self.array[ij[0], ij[1]] = (
+                np.nan if value is None else value.get()
+            )
+            self.dirty.add((ij[0] % self.w, ij[1] % self.h))
 
     def __len__(self):
         """ returns the smallest dimensions of the grid
@@ -196,10 +308,10 @@ class Grid:
             all parameters must be instances of `Point` (and cannot be
             `None`)
         """
-        self.points[0][0] = Point.assertIsPoint(topLeft, False)
-        self.points[-1][0] = Point.assertIsPoint(topRight, False)
-        self.points[-1][-1] = Point.assertIsPoint(bottomRight, False)
-        self.points[0][-1] = Point.assertIsPoint(bottomLeft, False)
+        self[0, 0] = Point.assertIsPoint(topLeft, False)
+        self[-1, 0] = Point.assertIsPoint(topRight, False)
+        self[-1, -1] = Point.assertIsPoint(bottomRight, False)
+        self[0, -1] = Point.assertIsPoint(bottomLeft, False)
 
         return self
 
@@ -212,19 +324,19 @@ class Grid:
         """
         if tops is not None:
             for k in range(1, self.w - 1):
-                self.points[k][0] = Point.assertIsPoint(tops[k - 1])
+                self[k, 0] = tops[k - 1]
 
         if rights is not None:
             for k in range(1, self.h - 1):
-                self.points[-1][k] = Point.assertIsPoint(rights[k - 1])
+                self[-1, k] = rights[k - 1]
 
         if bottoms is not None:
             for k in range(1, self.w - 1):
-                self.points[k][-1] = Point.assertIsPoint(bottoms[k - 1])
+                self[k, -1] = bottoms[k - 1]
 
         if lefts is not None:
             for k in range(1, self.h - 1):
-                self.points[0][k] = Point.assertIsPoint(lefts[k - 1])
+                self[0, k] = lefts[k - 1]
 
         return self
 
@@ -234,108 +346,268 @@ class Grid:
 
             if `rows` is true:
                 places the missing points for each of the border rows
-                (see `Grid.setRows`); the added points are placed using
-                the `Point.between` function with the the closest
-                defined (i.e. non-`None`) points on the same row: if a
-                point has be set on the row, it will likely be used
-                instead of the corner to ensure a straight line (I hope
-                you get the point...)
+                (see `Grid.setRows`); the added points are placed
+                linearly between the closest defined (i.e. non-`None`)
+                points on the same row: if a point has be set on the
+                row, it will likely be used instead of the corner to
+                ensure a straight line (I hope you get the point...)
 
             if `fill` is true:
                 places the missing inner points (i.e. excluding border
-                rows and corners); the added points are placed using
-                the `Point.intersect` function with the corresponding
-                points from the border rows
+                rows and corners); the added points are placed at the
+                intersection of the lines between the corresponding
+                points from the border rows (see `Point.intersect`)
+
+            both are computed over whole rows of the grid's array
 
             returns `True` if the grid is completed i.e. every element
             is a valid instance of `Point`
         """
+        A = self.array
+
         if rows:
-            def g(i, j, di, dj):
-                """
-                (i_, j_) of first non-`None` points starting from
-                (i, j) and moving by (di, dj)
+            def align(row):
                 """
-                i+= di
-                j+= dj
-                while self[i, j] is None:
-                    i+= di
-                    j+= dj
-                return i, j
-
-            def p(i, j, di, dj):
+                fills the `NaN`s of the `row` array (of shape `(n, 2)`)
+                between its closest defined values
                 """
-                point between the first non-`None` from (i, j)
-                moving by (di, dj) and the first non-`None` from
-                (i, j) moving by (-di, -dj)
-                """
-                ija, ijb = g(i, j, di, dj), g(i, j, -di, -dj)
-                if di:
-                    r = abs(ija[0] - i) / abs(ija[0] - ijb[0])
-                else:
-                    r = abs(ija[1] - j) / abs(ija[1] - ijb[1])
-                return Point.between(self[ija], self[ijb], r)
+                missing = np.isnan(row[:, 0])
+                if missing.any():
+                    k = np.arange(len(row))
+                    for c in range(2):
+                        row[missing, c] = np.interp(
+                            k[missing],
+                            k[~missing], row[~missing, c]
+                        )
 
-            for k in range(1, self.w - 1):
-                if not self.points[k][0]:
-                    self.points[k][0] = p(k, 0, 1, 0)
+            align(A[:, 0])
+            align(A[:, -1])
+            align(A[0, :])
+            align(A[-1, :])
 
-                if not self.points[k][-1]:
-                    self.points[k][-1] = p(k, -1, 1, 0)
+        if fill:
+            inner = A[1:-1, 1:-1]
+            missing = np.isnan(inner[..., 0])
+            if missing.any():
+                a, b = A[1:-1, :1], A[1:-1, -1:]
+                c, d = A[:1, 1:-1], A[-1:, 1:-1]
 
-            for k in range(1, self.h - 1):
-                if not self.points[0][k]:
-                    self.points[0][k] = p(0, k, 0, 1)
+                r, s = b - a, d - c
+                z = r[..., 0] * s[..., 1] - r[..., 1] * s[..., 0]
+                ac = c - a
+                t = (ac[..., 0] * s[..., 1] - ac[..., 1] * s[..., 0]) / z
 
-                if not self.points[-1][k]:
-                    self.points[-1][k] = p(-1, k, 0, 1)
+                inner[missing] = (a + t[..., np.newaxis] * r)[missing]
 
-        if fill:
-            def q(i, j):
-                ai, bi = self.points[i][0], self.points[i][-1]
-                aj, bj = self.points[0][j], self.points[-1][j]
-                return Point.intersect(ai, bi, aj, bj)
+        return bool(rows and fill or not np.isnan(A).any())
 
-            for i in range(1, self.w - 1):
-                for j in range(1, self.h - 1):
-                    if not self.points[i][j]:
-                        self.points[i][j] = q(i, j)
+    def copy(self):
+        """ returns a new grid with the same points
 
-        return (rows and fill or
-                all([all(isinstance(p, Point) for p in l)]
-                    for l in self.points))
+            the loaded remap, if any, is shared (see `Grid.loadRemap`)
+            but the new grid is not bound
+        """
+        grid = Grid(self.w, self.h)
+        grid.array[:] = self.array
+        grid.remap = self.remap
+        return grid
 
     def getPlotQuad(self, n=0):
         """ returns the coordinates of the n-inner closed quadrilateral
         """
         return Point.asCoordinates(
-            self.points[n][n],
-            self.points[self.w - n - 1][n],
-            self.points[self.w - n - 1][self.h - n - 1],
-            self.points[n][self.h - n - 1],
-            self.points[n][n]
+            self[n, n],
+            self[self.w - n - 1, n],
+            self[self.w - n - 1, self.h - n - 1],
+            self[n, self.h - n - 1],
+            self[n, n]
         )
 
     def getPlotShape(self, n=0):
         """ returns the coordinates of the n-inner closed shape
         """
         return Point.asCoordinates(
-            *([self.points[l][n] for l in range(n, self.w-n)]
-            + [self.points[self.w-n-1][l] for l in range(n+1, self.h-n)]
-            + [self.points[l][self.h-n-1] for l in range(self.w-2-n, n-1, -1)]
-            + [self.points[n][l] for l in range(self.h-2-n, n-1, -1)])
+            *([self[l, n] for l in range(n, self.w-n)]
+            + [self[self.w-n-1, l] for l in range(n+1, self.h-n)]
+            + [self[l, self.h-n-1] for l in range(self.w-2-n, n-1, -1)]
+            + [self[n, l] for l in range(self.h-2-n, n-1, -1)])
         )
 
+    def bounds(self):
+        """ returns the bounding box of the grid's points
+
+            the box is a tuple `(left, top, right, bottom)`
+        """
+        X, Y = self.array[..., 0], self.array[..., 1]
+        return np.nanmin(X), np.nanmin(Y), np.nanmax(X), np.nanmax(Y)
+
+    def reduction(self, destSize):
+        """ returns the factor by which the image could be reduced
+
+            this is the ratio of the length of the shortest border row
+            of the grid to the corresponding dimension of `destSize`,
+            i.e. the number of pixels of the image that end up in one
+            pixel of the result (at least)
+        """
+        length = lambda row: np.hypot(*np.diff(row, axis=0).T).sum()
+        w_, h_ = destSize
+        return min(
+            length(self.array[:, 0]) / w_, length(self.array[:, -1]) / w_,
+            length(self.array[0, :]) / h_, length(self.array[-1, :]) / h_
+        )
+
+    def setFrame(self, frame=None):
+        """ sets the frame of the bound image
+
+            with `frame` being `(x, y, scale)`, the pixel at `(i, j)`
+            in the bound image is the one at `(x + i * scale, y + j *
+            scale)` in the full image (see `Util.openRegion`); the
+            points stay in the coordinates of the full image and are
+            only moved into the frame to be sampled (see
+            `Grid.framed`); with `None`, the full image is bound
+        """
+        self.frame = frame
+        self.previous = None
+        return self
+
+    def framed(self):
+        """ returns the grid with its points moved into its frame
+
+            this is the grid itself if it has no frame (see
+            `Grid.setFrame`), otherwise a copy sharing the bound image,
+            the target size and the loaded remap, where the point at
+            `(i, j)` is moved to `((i - x) / scale, (j - y) / scale)`
+        """
+        if self.frame is None:
+            return self
+        x, y, scale = self.frame
+        grid = self.copy()
+        grid.array-= (x, y)
+        grid.array/= scale
+        grid.image, grid.target = self.image, self.target
+        return grid
+
     def bind(self, image, destSize):
         """ binds an image to the grid and set the expected result size
+
+            `image` can also be a path to an image: only the region of
+            the image covered by the grid is then decoded, at a reduced
+            scale if the result is much smaller than the region (see
+            `Util.openRegion`), and recorded as the grid's frame (see
+            `Grid.setFrame`); with a loaded remap, the whole image is
+            decoded, as the remap was compiled for it
+
+            `image` can also be a `numpy` array, or any object
+            supporting the buffer protocol, of shape `(h, w)` or `(h,
+            w, channels)`: it is then sampled in place (see
+            `Util.asSource`), and the results are arrays as well; only
+            the `ENGINE_NUMPY` engine supports it
         """
         self.target = destSize
+        if self.remap is not None or self.complete():
+            frame = None
+            if isinstance(image, (str, bytes, os.PathLike)):
+                if self.remap is not None:
+                    image = iap.Util.openImage(image)
+                else:
+                    image, frame = iap.Util.openRegion(
+                        image,
+                        self.bounds(),
+                        self.reduction(destSize)
+                    )
+            self.setFrame(frame)
+            self.image = iap.Util.asSource(image)
+            return self
+        return None
+
+    def decode(self, mode=None):
+        """ returns the pixels of the bound image as an array
+
+            see `Util.toArray`; this is profiled as the 'decode' phase
+            (see `imagdapt.phase`), `mode` is only given to the event
+        """
+        w, h = iap.Util.imageSize(self.image)
+        return iap.phase(
+            'decode',
+            lambda: iap.Util.toArray(self.image),
+            mode=mode, pixels=w * h
+        )
+
+    def compile(self, mode=iap.MODE_LINE):
+        """ compiles the bound grid for the given mode
+
+            returns the `Remap` used by the `ENGINE_NUMPY` engine,
+            which is cached until any of the points, the target size
+            or the size of the bound image changes
+
+            if a remap was loaded (see `Grid.loadRemap`) for this
+            mode, target size and image size, it is returned instead
+        """
+        d = dir(self)
+        assert 'image' in d and 'target' in d
+        self.checkComplete(mode)
+
+        return self.loaded(mode) or iap.Remap.get(self, mode)
+
+    def checkComplete(self, mode, engine=iap.ENGINE_NUMPY):
+        """ raises a `ValueError` if the bound grid cannot be extracted
+
+            an incomplete grid (see `Grid.complete`) can only be
+            extracted with `ENGINE_NUMPY`, using its loaded remap,
+            which must match the mode, the target size and the image
+            size (see `Grid.loaded`)
+        """
         if self.complete():
-            self.image = image
             return self
+        if self.remap is None:
+            raise ValueError("Incomplete grid without a loaded remap.")
+        if engine != iap.ENGINE_NUMPY:
+            raise ValueError("Only ENGINE_NUMPY can extract an incomplete "
+                + "grid (with its loaded remap).")
+        if self.loaded(mode) is None:
+            raise ValueError("Incomplete grid whose loaded remap does not "
+                + "match the mode, the target size or the image size.")
+        return self
+
+    def loaded(self, mode):
+        """ returns the loaded remap if it matches, otherwise `None`
+
+            the remap loaded with `Grid.loadRemap` matches if it was
+            compiled for this mode, target size and bound image size
+        """
+        remap = self.remap
+        if (remap is not None and remap.mode == mode
+                and remap.target == tuple(self.target)
+                and remap.source == tuple(iap.Util.imageSize(self.image))):
+            return remap
         return None
 
-    def extract(self, mode=iap.MODE_LINE, transform=None):
+    def saveRemap(self, fp, mode=iap.MODE_LINE):
+        """ compiles the bound grid and saves it to the file `fp`
+
+            see `Grid.compile` and `Remap.save`
+        """
+        self.compile(mode).save(fp)
+        return self
+
+    def loadRemap(self, fp):
+        """ loads a compiled grid from the file `fp`
+
+            the loaded `Remap` is used instead of the grid's points by
+            `Grid.extract` with the `ENGINE_NUMPY` engine for its mode
+            and target size, so no geometry is computed (the target
+            size is set accordingly, see `Remap.load`); the other
+            engines always sample the grid's points, so a grid with
+            only a loaded remap is extracted with `ENGINE_NUMPY` only
+            (see `Grid.checkComplete`)
+        """
+        self.remap = iap.Remap.load(fp)
+        self.target = self.remap.target
+        return self
+
+    def extract(self, mode=iap.MODE_LINE, transform=None,
+                engine=iap.ENGINE_PIXEL, resample=None, workers=None,
+                processes=False, out=None, at=None):
         """ apply the extraction algorithm designed by the chosen mode
 
             `mode` should be one of the value defined by the `imagdapt`
@@ -343,21 +615,660 @@ class Grid:
                 - `MODE_QUAD`
                 - `MODE_LINE`
                 - `MODE_POLY`
+                - `MODE_PERSP`
+
+            `engine` selects the implementation used, one of:
+                - `ENGINE_PIXEL` (see `Extractor`)
+                - `ENGINE_NUMPY` (see `VectorExtractor`)
+                - `ENGINE_PIL` (see `MeshExtractor`)
+
+            `resample` is the Pillow filter used by `ENGINE_PIL` (by
+            default `Image.NEAREST`), it is ignored by other engines
 
             if a `transform` function is provided, it will be called
             for each pixel and its result will be applied instead of
-            the pixel itself
+            the pixel itself; this is slow, and a `Transform` (which is
+            applied to the whole result at once) should be preferred
+
+            with `ENGINE_NUMPY`, the compiled grid is used (see
+            `Grid.compile`)
+
+            if `workers` is given, the rows of the result are split
+            across a pool of that many threads (see
+            `Grid.extractRows`), or processes if `processes` is true
+            (see `Grid.extractShared`); this requires `ENGINE_NUMPY`
+
+            if `out` is given (an array, or a writable object supporting
+            the buffer protocol, see `Util.toBuffer`), the result is
+            written into it and returned as an array; with
+            `ENGINE_NUMPY`, the pixels are sampled straight into it
+
+            the phases of the extraction can be profiled by installing
+            a sink, see `imagdapt.addSink`
+
+            with `at = (x, y)`, `out` can be larger than the result
+            (e.g. an atlas of several extractions), which is then
+            written into the rectangle of `out` starting at `at`; `out`
+            can also be an image, into which the result is pasted (at
+            `at`, if given) and which is returned
         """
         d = dir(self)
-        assert 'image' in d and 'target' in d and self.complete()
+        assert 'image' in d and 'target' in d
+        w_, h_ = self.target
+        info = {'mode': mode, 'engine': engine, 'pixels': w_ * h_}
+        iap.phase(
+            'complete', lambda: self.checkComplete(mode, engine),
+            **info
+        )
+
+        if workers and engine != iap.ENGINE_NUMPY:
+            raise ValueError("Only ENGINE_NUMPY can extract with workers.")
+        if (engine != iap.ENGINE_NUMPY
+                and isinstance(self.image, np.ndarray)):
+            raise ValueError("Only ENGINE_NUMPY can extract from an array.")
+        canvas = None
+        if iap.Util.isImage(out):
+            canvas, out = out, None
+        elif out is not None:
+            out = iap.Util.toBuffer(out, self.target, self.image, at)
+
+        extractor = {
+            iap.ENGINE_PIXEL: iap.Extractor,
+            iap.ENGINE_NUMPY: iap.VectorExtractor,
+            iap.ENGINE_PIL: iap.MeshExtractor
+        }[engine]
 
         calls = {
-            iap.MODE_QUAD: iap.Extractor.extractQuadrilateral,
-            iap.MODE_LINE: iap.Extractor.extractLinear,
-            iap.MODE_POLY: iap.Extractor.extractPolynomial
+            iap.MODE_QUAD: extractor.extractQuadrilateral,
+            iap.MODE_LINE: extractor.extractLinear,
+            iap.MODE_POLY: extractor.extractPolynomial,
+            iap.MODE_PERSP: extractor.extractPerspective
         }
 
-        timingResult = {}
-        r = iap.time(lambda: calls[mode](self, transform), timingResult)
-        iap.log('extract', "operation took", timingResult['time'] / 1e9, "s")
+        options = {}
+        if engine == iap.ENGINE_PIL and resample is not None:
+            options['resample'] = resample
+        if engine == iap.ENGINE_NUMPY and out is not None:
+            options['out'] = out
+
+        pixelTransform = transform
+        if (engine != iap.ENGINE_NUMPY
+                and isinstance(transform, iap.Transform)):
+            pixelTransform = None
+
+        call = lambda: calls[mode](self, pixelTransform, **options)
+        if engine != iap.ENGINE_NUMPY:
+            sample = call
+            call = lambda: iap.phase('sample', sample, **info)
+        if workers:
+            call = lambda: self.extractRows(mode, transform, workers, out)
+        if workers and processes:
+            call = lambda: self.extractShared(
+                mode, transform, workers,
+                out=out
+            )
+
+        def run():
+            r = call()
+            if pixelTransform is not transform:
+                r = iap.phase(
+                    'transform',
+                    lambda: transform.applyImage(r),
+                    **info
+                )
+            if out is not None and r is not out:
+                iap.phase(
+                    'assemble',
+                    lambda: np.copyto(out, iap.Util.toArray(r)),
+                    **info
+                )
+                r = out
+            if canvas is not None:
+                if not iap.Util.isImage(r):
+                    r = iap.Util.fromArray(r, canvas)
+                iap.phase(
+                    'assemble',
+                    lambda: canvas.paste(r, at or (0, 0)),
+                    **info
+                )
+                r = canvas
+            return r
+
+        return iap.phase('extract', run, **info)
+
+    def extractPyramid(self, sizes, mode=iap.MODE_LINE, transform=None,
+                       **options):
+        """ extracts the result at several target sizes at once
+
+            the sizes are visited from the largest area down: each size
+            is reduced from the smallest level already extracted that
+            is at least as large on both axes (see `Util.reduce`), and
+            only the sizes that no other one covers are sampled from
+            the image; `transform` is then applied to every level
+
+            `options` are passed to `Grid.extract` (e.g. `engine`);
+            returns the list of the results, in the order of `sizes`
+        """
+        sizes = [tuple(size) for size in sizes]
+
+        target = self.target
+        built = {}
+        try:
+            for w, h in sorted(set(sizes), key=lambda size: -size[0] * size[1]):
+                above = [
+                    size for size in built
+                    if w <= size[0] and h <= size[1]
+                ]
+                if above:
+                    size = min(above, key=lambda size: size[0] * size[1])
+                    built[w, h] = iap.Util.reduce(built[size], (w, h))
+                else:
+                    self.target = w, h
+                    built[w, h] = self.extract(mode, **options)
+        finally:
+            self.target = target
+        levels = {}
+        for k, size in enumerate(sizes):
+            level = built[size]
+            if size in sizes[:k]:
+                level = level.copy()
+            levels[k] = level
+
+        if transform is not None:
+            for k, level in levels.items():
+                levels[k] = iap.Util.fromArray(
+                    iap.VectorExtractor.transformArray(
+                        iap.Util.toArray(level),
+                        transform, self.image
+                    ),
+                    level
+                )
+        return [levels[k] for k in range(len(sizes))]
+
+    def extractRows(self, mode=iap.MODE_LINE, transform=None, workers=None,
+                    out=None):
+        """ extracts with `ENGINE_NUMPY`, splitting rows across threads
+
+            the rows of the result are split into chunks which are
+            computed and sampled in a pool of `workers` threads (by
+            default, as many as CPUs); every chunk is written into the
+            same preallocated result, and the array operations release
+            the GIL so the chunks are processed in parallel
+
+            the compiled grid is used if already cached or loaded (see
+            `Grid.compile`), otherwise each chunk computes its part of
+            it and the whole is cached afterward
+
+            the result is written into `out` if given (see
+            `Grid.extract`)
+        """
+        d = dir(self)
+        assert 'image' in d and 'target' in d
+        self.checkComplete(mode)
+
+        w_, h_ = self.target
+        size = iap.Util.imageSize(self.image)
+        buffer = self.decode(mode)
+
+        key = iap.Remap.key(self, mode)
+        remap = self.loaded(mode) or iap.Remap.cache.find(key)
+        if remap is None:
+            index = np.empty((h_, w_), iap.VectorExtractor.indexType(size))
+        else:
+            index = remap.index
+        if out is None:
+            pixels = np.empty((h_, w_, *buffer.shape[2:]), buffer.dtype)
+        else:
+            pixels = iap.Util.toBuffer(out, self.target, self.image)
+
+        def chunk(top):
+            bottom = min(top + rows, h_)
+            info = {'mode': mode, 'pixels': (bottom - top) * w_}
+            if remap is None:
+                X, Y = iap.phase(
+                    'remap',
+                    lambda: iap.VectorExtractor.map(self, mode, top, bottom),
+                    **info
+                )
+                index[top:bottom] = iap.VectorExtractor.index(X, Y, size)
+            patch = iap.phase(
+                'sample',
+                lambda: iap.VectorExtractor.sample(buffer, index[top:bottom]),
+                **info
+            )
+            if transform is not None:
+                patch = iap.phase(
+                    'transform',
+                    lambda: iap.VectorExtractor.transformArray(
+                        patch,
+                        transform, self.image
+                    ),
+                    **info
+                )
+            pixels[top:bottom] = patch
+
+        workers = workers or os.cpu_count()
+        rows = max(-(-h_ // (4 * workers)), 16)
+        with ThreadPoolExecutor(workers) as pool:
+            for _ in pool.map(chunk, range(0, h_, rows)):
+                pass
+
+        if remap is None:
+            iap.Remap.cache.put(key, iap.Remap(index, mode, size))
+        if out is not None:
+            return pixels
+        return iap.Util.fromArray(pixels, self.image)
+
+    def extractShared(self, mode=iap.MODE_LINE, transform=None,
+                      workers=None, band=256, out=None):
+        """ extracts with `ENGINE_NUMPY`, splitting rows across processes
+
+            the pixels of the bound image are copied once, band by
+            band, into a `multiprocessing.shared_memory` block, and the
+            result is allocated in another one; a pool of `workers`
+            processes (by default, as many as CPUs) then computes the
+            result by bands of `band` rows, each reading the source and
+            writing its rows of the result in place
+
+            only the grid (or the path of the loaded remap, see
+            `Remap`) and the names of the blocks are sent to the
+            processes; if a `transform` function is provided, it must
+            be picklable (e.g. defined at the top level of a module)
+
+            the result is copied into `out` if given (see
+            `Grid.extract`)
+        """
+        d = dir(self)
+        assert 'image' in d and 'target' in d
+        self.checkComplete(mode)
+
+        w_, h_ = self.target
+        image = self.image
+        sw, sh = iap.Util.imageSize(image)
+
+        pixel, dtype = iap.Util.pixelType(image)
+        itemsize = dtype.itemsize * int(np.prod(pixel))
+        rows = lambda top, bottom: (
+            image[top:bottom] if isinstance(image, np.ndarray)
+            else iap.Util.toArray(image.crop((0, top, sw, bottom)))
+        )
+
+        source = SharedMemory(create=True, size=sw * sh * itemsize)
+        result = SharedMemory(create=True, size=w_ * h_ * itemsize)
+        try:
+            S = np.ndarray((sh, sw, *pixel), dtype, source.buf)
+
+            def decode():
+                for top in range(0, sh, band):
+                    bottom = min(top + band, sh)
+                    S[top:bottom] = rows(top, bottom)
+
+            iap.phase('decode', decode, mode=mode, pixels=sw * sh)
+            del S
+
+            grid = self.framed().copy()
+            grid.target = w_, h_
+            with ProcessPoolExecutor(
+                workers or os.cpu_count(),
+                initializer=Grid._sharedInit,
+                initargs=(
+                    grid, mode, transform, self.loaded(mode), band,
+                    (source.name, (sh, sw, *pixel), dtype.str),
+                    (result.name, (h_, w_, *pixel), dtype.str),
+                    getattr(image, 'mode', None)
+                )
+            ) as pool:
+                for _ in pool.map(Grid._sharedExtract, range(0, h_, band)):
+                    pass
+
+            R = np.ndarray((h_, w_, *pixel), dtype, result.buf)
+            if out is None:
+                r = iap.Util.fromArray(R.copy(), image)
+            else:
+                r = iap.Util.toBuffer(out, self.target, image)
+                r[...] = R
+            del R
+        finally:
+            for block in source, result:
+                block.close()
+                block.unlink()
         return r
+
+    @staticmethod
+    def _sharedInit(grid, mode, transform, remap, band,
+                    source, result, imageMode):
+        """ sets up a worker process of `Grid.extractShared`
+        """
+        blocks, arrays = [], []
+        for name, shape, dtype in source, result:
+            block = SharedMemory(name)
+            blocks.append(block)
+            arrays.append(np.ndarray(shape, dtype, block.buf))
+
+        like = arrays[0]
+        if imageMode is not None:
+            like = iap.Util.newImage(imageMode, (1, 1))
+        Grid._shared = grid, mode, transform, remap, band, arrays, like, blocks
+
+    @staticmethod
+    def _sharedExtract(top):
+        """ extracts one band in a worker of `Grid.extractShared`
+        """
+        grid, mode, transform, remap, band, arrays, like, _ = Grid._shared
+        S, R = arrays
+        bottom = min(top + band, R.shape[0])
+
+        if remap is not None:
+            index = remap.index[top:bottom]
+        else:
+            X, Y = iap.VectorExtractor.map(grid, mode, top, bottom)
+            index = iap.VectorExtractor.index(X, Y, S.shape[1::-1])
+
+        R[top:bottom] = iap.VectorExtractor.transformArray(
+            iap.VectorExtractor.sample(S, index),
+            transform, like
+        )
+
+    def extractIncremental(self, mode=iap.MODE_LINE, transform=None):
+        """ extracts with `ENGINE_NUMPY`, reusing the previous result
+
+            the first call extracts the whole result and keeps it along
+            with its indices (see `VectorExtractor.index`); the next
+            calls (with the same mode, transform, target size and bound
+            image) only recompute the cells of the result affected by
+            the points set since (see `Grid.__setitem__`), and patch
+            them into the kept result
+
+            a cell is affected by the points it is made of (with
+            `MODE_LINE` and `MODE_PERSP`), or by those of the
+            neighbouring cells too (with `MODE_POLY`); with `MODE_QUAD`
+            the whole result is recomputed if a corner moved
+
+            the `transform` must work pixel by pixel (see
+            `Grid.extract`)
+        """
+        d = dir(self)
+        assert 'image' in d and 'target' in d and self.complete()
+
+        w_, h_ = self.target
+        previous = self.previous
+
+        if (previous is None
+                or previous['mode'] != mode
+                or previous['transform'] is not transform
+                or previous['target'] != (w_, h_)
+                or previous['image'] is not self.image):
+            rects = [(0, h_, 0, w_)]
+            buffer = self.decode(mode)
+            index = np.empty((h_, w_), np.int64)
+            pixels = None
+        else:
+            rects = self.dirtyRects(mode)
+            buffer = previous['buffer']
+            index, pixels = previous['index'], previous['pixels']
+
+        for top, bottom, left, right in rects:
+            X, Y = iap.VectorExtractor.map(
+                self, mode,
+                top, bottom, left, right
+            )
+            patch = iap.VectorExtractor.index(
+                X, Y,
+                iap.Util.imageSize(self.image)
+            )
+            index[top:bottom, left:right] = patch
+
+            patch = iap.VectorExtractor.transformArray(
+                iap.VectorExtractor.sample(buffer, patch),
+                transform, self.image
+            )
+            if pixels is None:
+                pixels = np.empty((h_, w_, *patch.shape[2:]), patch.dtype)
+            pixels[top:bottom, left:right] = patch
+
+        self.dirty.clear()
+        self.previous = {
+            'mode': mode,
+            'transform': transform,
+            'target': (w_, h_),
+            'image': self.image,
+            'buffer': buffer,
+            'index': index,
+            'pixels': pixels
+        }
+        return iap.Util.fromArray(pixels, self.image)
+
+    def dirtyRects(self, mode):
+        """ returns the parts of the result affected by dirty points
+
+            returns a list of `(top, bottom, left, right)` rectangles
+            of the result, one per affected cell (see
+            `Grid.extractIncremental`)
+        """
+        if not self.dirty:
+            return []
+
+        w_, h_ = self.target
+        w, h = self.w - 1, self.h - 1
+
+        if mode == iap.MODE_QUAD:
+            corners = {(0, 0), (w, 0), (w, h), (0, h)}
+            return [(0, h_, 0, w_)] if self.dirty & corners else []
+
+        before, after = (2, 1) if mode == iap.MODE_POLY else (1, 0)
+        cells = set()
+        for i, j in self.dirty:
+            for ci in range(max(i - before, 0), min(i + after, w - 1) + 1):
+                for cj in range(max(j - before, 0), min(j + after, h - 1) + 1):
+                    cells.add((ci, cj))
+
+        columns = (np.arange(w_) / (w_ / w)).astype(np.intp)
+        rows = (np.arange(h_) / (h_ / h)).astype(np.intp)
+
+        def span(cells, k):
+            where = np.flatnonzero(cells == k)
+            return (where[0], where[-1] + 1) if len(where) else (0, 0)
+
+        return [
+            (*span(rows, cj), *span(columns, ci))
+            for ci, cj in sorted(cells)
+        ]
+
+    def extractBands(self, mode=iap.MODE_LINE, transform=None, band=64):
+        """ extracts the result in horizontal bands of `band` rows
+
+            this is a generator which yields tuples `(top, image)`
+            where `image` is the band of the result starting at the
+            row `top`; the bands are computed one at a time with the
+            `ENGINE_NUMPY` engine (but without the `Remap` cache), so
+            that the memory used depends on the band size and not on
+            the target size
+
+            see `Grid.extract` for `mode` and `transform`
+        """
+        d = dir(self)
+        assert 'image' in d and 'target' in d
+        self.checkComplete(mode)
+
+        w_, h_ = self.target
+        remap = self.loaded(mode)
+        buffer = self.decode(mode)
+
+        for top in range(0, h_, band):
+            bottom = min(top + band, h_)
+            if remap is not None:
+                index = remap.index[top:bottom]
+            else:
+                X, Y = iap.VectorExtractor.map(self, mode, top, bottom)
+                index = iap.VectorExtractor.index(
+                    X, Y,
+                    iap.Util.imageSize(self.image)
+                )
+            yield top, iap.VectorExtractor.gather(
+                self.image, index,
+                transform, buffer
+            )
+
+    def extractTo(self, fp, mode=iap.MODE_LINE, transform=None, band=64):
+        """ extracts the result band by band straight to a file
+
+            `fp` is a path or a file object opened in binary mode;
+            the result is written as a binary PGM (for 'L' images) or
+            PPM (for 'RGB' images) file, see `Grid.extractBands`
+        """
+        imageMode = getattr(self.image, 'mode', None)
+        if isinstance(self.image, np.ndarray) and self.image.dtype == np.uint8:
+            imageMode = {(): 'L', (3,): 'RGB'}.get(self.image.shape[2:])
+        magic = {'L': b"P5", 'RGB': b"P6"}.get(imageMode)
+        if magic is None:
+            raise ValueError(f"Cannot stream a '{imageMode}' image, "
+                + "only 'L' and 'RGB' images are supported.")
+
+        f = fp if hasattr(fp, 'write') else open(fp, 'wb')
+        try:
+            f.write(b"%s\n%d %d\n255\n" % (magic, *self.target))
+            for _, image in self.extractBands(mode, transform, band):
+                f.write(image.tobytes())
+        finally:
+            if f is not fp:
+                f.close()
+        return self
+
+    @staticmethod
+    def extractAll(image, jobs, transform=None, workers=None, out=None):
+        """ extracts several parts of the same image
+
+            `image` is an image or a path to an image (opened with
+            `Util.openImage`); `jobs` is a list of `(grid, target,
+            mode)` tuples, each grid is bound to the image with its
+            target size (see `Grid.bind`) and compiled for its mode
+            (see `Grid.compile`)
+
+            the image is converted to an array only once, then every
+            part is gathered from it, in a pool of `workers` threads if
+            given (the gathers release the GIL)
+
+            returns the list of extracted images, in the order of the
+            jobs
+
+            if an `out` array is given, the jobs are `(grid, target,
+            mode, at)` tuples and each part is written into `out` at
+            `at` (see `Grid.extract`), e.g. to build an atlas; the
+            returned list is then made of the views of `out`
+        """
+        image = Grid._open(image)
+        w, h = iap.Util.imageSize(image)
+        buffer = iap.phase(
+            'decode',
+            lambda: iap.Util.toArray(image),
+            pixels=w * h
+        )
+
+        remaps, outs = [], []
+        for grid, target, mode, *at in jobs:
+            remaps.append(grid.bind(image, target).compile(mode))
+            outs.append(None if out is None else iap.Util.toBuffer(
+                out, target, grid.image,
+                *at
+            ))
+        gather = lambda remap, out: iap.VectorExtractor.gather(
+            image, remap.index,
+            transform, buffer, out
+        )
+
+        if not workers:
+            return [gather(remap, out) for remap, out in zip(remaps, outs)]
+        with ThreadPoolExecutor(workers) as pool:
+            return list(pool.map(gather, remaps, outs))
+
+    def extractMany(self, sources, mode=iap.MODE_LINE, transform=None,
+                    workers=None, inflight=None, target=None):
+        """ extracts the same part from each of the `sources`
+
+            `sources` is an iterable of images or of paths to images
+            (opened with `Util.openImage`); this is a generator which
+            yields the extracted images in the order of the sources
+
+            the grid is compiled once (see `Grid.compile`) for the
+            size of the first source, then the opening and sampling
+            of the sources is spread across a pool of `workers`
+            processes (by default, as many as CPUs); `workers=0` does
+            everything in the calling process
+
+            at most `inflight` sources (by default twice the number of
+            workers) are submitted at a time, so that the memory used
+            does not grow with the number of sources
+
+            `target` is the size of the results, by default the target
+            size the grid was last bound with (see `Grid.bind`); the
+            grid does not need to be bound otherwise
+
+            if a `transform` function is provided, it must be
+            picklable (e.g. defined at the top level of a module)
+        """
+        target = target or getattr(self, 'target', None)
+        if target is None:
+            raise ValueError("No target size: give one, or bind the grid "
+                + "with one first.")
+
+        sources = iter(sources)
+        first = next(sources, None)
+        if first is None:
+            return
+        sources = chain([first], sources)
+
+        batch = self.copy()
+        batch.remap = batch.bind(Grid._open(first), target).compile(mode)
+        del batch.image
+
+        state = batch, mode, transform
+        if workers == 0:
+            for source in sources:
+                yield Grid._batchExtract(source, state)
+            return
+
+        workers = workers or os.cpu_count()
+        inflight = inflight or 2 * workers
+        pool = ProcessPoolExecutor(
+            workers,
+            initializer=Grid._batchInit,
+            initargs=state
+        )
+        try:
+            pending = deque()
+            for source in sources:
+                if inflight <= len(pending):
+                    yield pending.popleft().result()
+                pending.append(pool.submit(Grid._batchExtract, source))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _open(source):
+        """ opens `source` if it is a path, otherwise returns it
+        """
+        if isinstance(source, (str, bytes, os.PathLike)):
+            return iap.Util.openImage(source)
+        return source
+
+    @staticmethod
+    def _batchInit(grid, mode, transform):
+        """ sets up a worker process of `Grid.extractMany`
+        """
+        Grid._batch = grid, mode, transform
+
+    @staticmethod
+    def _batchExtract(source, state=None):
+        """ extracts from one source in a worker of `Grid.extractMany`
+
+            `state` is `(grid, mode, transform)`, by default the one
+            set up by `Grid._batchInit` in the worker process
+        """
+        grid, mode, transform = state or Grid._batch
+        image = Grid._open(source)
+        return grid.bind(image, grid.target).compile(mode).apply(
+            image,
+            transform
+        )
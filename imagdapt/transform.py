@@ -0,0 +1,99 @@
+import imagdapt as iap
+import numpy as np
+
+class Transform:
+    """ a pixel transform applied to whole arrays of pixels
+
+        unlike a function called for each pixel (which `Grid.extract`
+        still accepts as a slow fallback), a `Transform` is applied
+        once to the whole result, or to each band of it
+
+        a `Transform` is either:
+         - a vectorized function, taking and returning an array of
+           pixels of shape `(h, w)` or `(h, w, channels)`; see
+           `Transform.vectorized`
+         - a lookup table per channel, which compiles down to
+           `Image.point` (or to a `numpy` indexing); see
+           `Transform.lut`, `Transform.threshold` and `Transform.invert`
+    """
+    def __init__(self, function=None, tables=None):
+        self.function = function
+        self.tables = tables
+
+    def __repr__(self):
+        """ returns `"Transform(lut)"` or `"Transform({function})"`
+        """
+        if self.tables is not None:
+            return "Transform(lut)"
+        return f"Transform({getattr(self.function, '__name__', '?')})"
+
+    def applyArray(self, pixels):
+        """ applies the transform to an array of pixels
+
+            returns a new array of the same shape
+        """
+        if self.tables is None:
+            return self.function(pixels)
+
+        tables = np.array(self.tables, pixels.dtype)
+        if pixels.ndim == 2:
+            return tables[0][pixels]
+        channels = pixels.shape[-1]
+        if len(tables) == 1:
+            tables = tables.repeat(channels, 0)
+        return tables[np.arange(channels), pixels]
+
+    def applyImage(self, image):
+        """ applies the transform to an image
+
+            returns a new image of the same mode and size
+        """
+        if self.tables is None:
+            return iap.Util.fromArray(
+                self.function(iap.Util.toArray(image)),
+                image
+            )
+
+        tables = self.tables
+        if len(tables) == 1:
+            tables = tables * len(image.getbands())
+        return image.point([v for table in tables for v in table])
+
+    @staticmethod
+    def vectorized(function):
+        """ returns a transform from a vectorized function
+
+            `function` receives an array of pixels of shape `(h, w)`
+            or `(h, w, channels)` and returns an array of the same
+            shape and type
+        """
+        return Transform(function=function)
+
+    @staticmethod
+    def lut(*tables):
+        """ returns a transform from lookup tables
+
+            each table is either a sequence of 256 values or a
+            function called with each of the 256 possible values; a
+            single table is used for every channel, otherwise there
+            must be one per channel (8-bit images only)
+        """
+        return Transform(tables=[
+            [table(v) for v in range(256)] if callable(table)
+            else list(table)
+            for table in tables
+        ])
+
+    @staticmethod
+    def threshold(level=128, low=0, high=255):
+        """ per-channel threshold
+
+            values below `level` become `low`, the others `high`
+        """
+        return Transform.lut(lambda v: low if v < level else high)
+
+    @staticmethod
+    def invert():
+        """ per-channel inversion, each value `v` becomes `255 - v`
+        """
+        return Transform.lut(lambda v: 255 - v)
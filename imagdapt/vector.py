@@ -0,0 +1,463 @@
+import imagdapt as iap
+import numpy as np
+
+class VectorExtractor:
+    """ static class of array-based extraction algorithms
+
+        the `map*` functions compute, for every pixel of the result,
+        the coordinates of the source pixel it is sampled from; these
+        pixels are then gathered all at once from the image buffer
+
+        results are the same as with the `Extractor` class (pixel
+        by pixel) but the work is done over whole arrays
+    """
+    @staticmethod
+    def mapQuadrilateral(grid, top=0, bottom=None, left=0, right=None):
+        """ source coordinates for the `MODE_QUAD` mode
+
+            returns two arrays `X` and `Y` of shape `(h, w)`, with
+            `w, h = grid.target`; only the rows from `top` to `bottom`
+            and the columns from `left` to `right` (excluded) are
+            computed if given
+        """
+        w_, h_ = grid.target
+        a, b = grid[0, 0], grid[-1, 0]
+        d, c = grid[0, -1], grid[-1, -1]
+
+        wa, ha = b.x - a.x, d.y - a.y
+        ua = iap.Point.vect(a, b, wa / w_)
+        va = iap.Point.vect(a, d, ha / h_)
+
+        wb, hb = c.x - d.x, c.y - b.y
+        ub = iap.Point.vect(a, b, wb / w_)
+        vb = iap.Point.vect(a, d, hb / h_)
+
+        i = np.arange(left, w_ if right is None else right)[np.newaxis, :]
+        j = np.arange(top, h_ if bottom is None else bottom)[:, np.newaxis]
+        px, py = i / w_, j / h_
+
+        X = (a.x
+            + i * ((1 - py) * ua.x + py * ub.x)
+            + j * ((1 - py) * va.x + py * vb.x))
+        Y = (a.y
+            + i * ((1 - px) * ua.y + px * ub.y)
+            + j * ((1 - px) * va.y + px * vb.y))
+
+        return X, Y
+
+    @staticmethod
+    def vect(A, B, mag):
+        """ same as `Point.vect` over arrays of points
+
+            `A` and `B` are arrays of coordinates of shape `(.., 2)`,
+            `mag` an array of the matching shape `(..)`
+        """
+        V = B - A
+        x, y = V[..., 0], V[..., 1]
+        l = mag / np.sqrt(x * x + y * y)
+        return np.stack((x * l, y * l), -1)
+
+    @staticmethod
+    def cells(grid):
+        """ origin and basis vectors of each cell for `MODE_LINE`
+
+            returns `(A, (UA, VA), (UB, VB))` where every element is
+            an array of shape `(w - 1, h - 1, 2)` (with `w` and `h` the
+            grid's size), matching the `field` of the
+            `Extractor.extractLinear` function
+        """
+        w_, h_ = grid.target
+        w, h = grid.w - 1, grid.h - 1
+        w__, h__ = w_ / w, h_ / h
+
+        P = grid.array
+        A, B = P[:-1, :-1], P[1:, :-1]
+        D, C = P[:-1, 1:], P[1:, 1:]
+
+        WA, HA = B[..., 0] - A[..., 0], D[..., 1] - A[..., 1]
+        UA = VectorExtractor.vect(A, B, WA / w__)
+        VA = VectorExtractor.vect(A, D, HA / h__)
+
+        WB, HB = C[..., 0] - D[..., 0], C[..., 1] - B[..., 1]
+        UB = VectorExtractor.vect(A, B, WB / w__)
+        VB = VectorExtractor.vect(A, D, HB / h__)
+
+        return A, (UA, VA), (UB, VB)
+
+    @staticmethod
+    def mapLinear(grid, top=0, bottom=None, left=0, right=None):
+        """ source coordinates for the `MODE_LINE` mode
+
+            the cell of each pixel and its offset within the cell are
+            computed for the whole result at once, then the per-cell
+            origins and basis vectors are broadcast over it
+
+            returns two arrays `X` and `Y` of shape `(h, w)`, with
+            `w, h = grid.target`; only the rows from `top` to `bottom`
+            and the columns from `left` to `right` (excluded) are
+            computed if given
+        """
+        w_, h_ = grid.target
+        w, h = grid.w - 1, grid.h - 1
+        w__, h__ = w_ / w, h_ / h
+
+        orig, base1, base2 = VectorExtractor.cells(grid)
+
+        i = np.arange(left, w_ if right is None else right)[np.newaxis, :]
+        j = np.arange(top, h_ if bottom is None else bottom)[:, np.newaxis]
+        cell = (i / w__).astype(np.intp), (j / h__).astype(np.intp)
+
+        i_, j_ = i % w__, j % h__
+        px, py = i_ / w__, j_ / h__
+
+        o, ua, va, ub, vb = (
+            it[cell]
+            for it in (orig, base1[0], base1[1], base2[0], base2[1])
+        )
+
+        ux = (1 - py) * ua[..., 0] + py * ub[..., 0]
+        uy = (1 - px) * ua[..., 1] + px * ub[..., 1]
+        vx = (1 - py) * va[..., 0] + py * vb[..., 0]
+        vy = (1 - px) * va[..., 1] + px * vb[..., 1]
+
+        X = o[..., 0] + i_ * ux + j_ * vx
+        Y = o[..., 1] + i_ * uy + j_ * vy
+
+        return X, Y
+
+    @staticmethod
+    def catmullRom(t):
+        """ weights of the 4 control points of a Catmull-Rom spline
+
+            returns an array of shape `(4, ..)` for the parameters `t`
+            (in `[0, 1]`) between the second and the third points
+        """
+        t2 = t * t
+        t3 = t2 * t
+        return np.stack((
+            (-t3 + 2 * t2 - t) / 2,
+            (3 * t3 - 5 * t2 + 2) / 2,
+            (-3 * t3 + 4 * t2 + t) / 2,
+            (t3 - t2) / 2
+        ))
+
+    @staticmethod
+    def fitPolynomial(grid):
+        """ control points of the surface for the `MODE_POLY` mode
+
+            the surface is a bicubic Catmull-Rom spline through every
+            point of the grid; the grid is padded with one row of
+            points on each side, extrapolated linearly from the border
+
+            returns an array of shape `(w + 2, h + 2, 2)`, with `w`
+            and `h` the grid's size
+        """
+        P = grid.array
+        P = np.concatenate((2 * P[:1] - P[1:2], P, 2 * P[-1:] - P[-2:-1]), 0)
+        return np.concatenate(
+            (2 * P[:, :1] - P[:, 1:2], P, 2 * P[:, -1:] - P[:, -2:-1]),
+            1
+        )
+
+    @staticmethod
+    def mapPolynomial(grid, top=0, bottom=None, left=0, right=None):
+        """ source coordinates for the `MODE_POLY` mode
+
+            the surface fitted by `VectorExtractor.fitPolynomial` is
+            evaluated for every pixel of the result; being smooth
+            across cells, it does not show the slicing of `MODE_LINE`
+
+            the spline is separable: it is first evaluated along the
+            grid's width for each column of the result, then along its
+            height for each row
+
+            returns two arrays `X` and `Y` of shape `(h, w)`, with
+            `w, h = grid.target`; only the rows from `top` to `bottom`
+            and the columns from `left` to `right` (excluded) are
+            computed if given
+        """
+        w_, h_ = grid.target
+        w, h = grid.w - 1, grid.h - 1
+        w__, h__ = w_ / w, h_ / h
+
+        P = VectorExtractor.fitPolynomial(grid)
+
+        u = np.arange(left, w_ if right is None else right) / w__
+        v = np.arange(top, h_ if bottom is None else bottom) / h__
+        ku = np.minimum(u.astype(np.intp), w - 1)
+        kv = np.minimum(v.astype(np.intp), h - 1)
+        wu = VectorExtractor.catmullRom(u - ku)
+        wv = VectorExtractor.catmullRom(v - kv)
+
+        Q = sum(
+            wu[k][:, np.newaxis, np.newaxis] * P[ku + k]
+            for k in range(4)
+        )
+        S = sum(
+            wv[k][:, np.newaxis, np.newaxis] * Q[:, kv + k].swapaxes(0, 1)
+            for k in range(4)
+        )
+
+        return S[..., 0], S[..., 1]
+
+    @staticmethod
+    def homographies(grid):
+        """ homography of each cell for the `MODE_PERSP` mode
+
+            the homography of a cell maps the unit square (`(0, 0)`,
+            `(1, 0)`, `(1, 1)`, `(0, 1)`) to the cell's corners (top
+            left, top right, bottom right, bottom left); the systems of
+            every cell are solved at once
+
+            returns an array of shape `(w - 1, h - 1, 3, 3)`, with `w`
+            and `h` the grid's size
+        """
+        P = grid.array
+        corners = np.stack((P[:-1, :-1], P[1:, :-1], P[1:, 1:], P[:-1, 1:]), 2)
+        x, y = corners[..., 0], corners[..., 1]
+        s = np.array([0., 1., 1., 0.])
+        t = np.array([0., 0., 1., 1.])
+
+        one, zero = np.ones_like(x), np.zeros_like(x)
+        rows = np.concatenate((
+            np.stack((s + zero, t + zero, one, zero, zero, zero,
+                      -s * x, -t * x), -1),
+            np.stack((zero, zero, zero, s + zero, t + zero, one,
+                      -s * y, -t * y), -1)
+        ), 2)
+        H = np.linalg.solve(rows, np.concatenate((x, y), 2)[..., np.newaxis])
+
+        H = np.concatenate((H[..., 0], one[..., :1]), -1)
+        return H.reshape(*H.shape[:2], 3, 3)
+
+    @staticmethod
+    def mapPerspective(grid, top=0, bottom=None, left=0, right=None):
+        """ source coordinates for the `MODE_PERSP` mode
+
+            each pixel is mapped by the homography of its cell (see
+            `VectorExtractor.homographies`), applied to its offset
+            within the cell
+
+            returns two arrays `X` and `Y` of shape `(h, w)`, with
+            `w, h = grid.target`; only the rows from `top` to `bottom`
+            and the columns from `left` to `right` (excluded) are
+            computed if given
+        """
+        w_, h_ = grid.target
+        w, h = grid.w - 1, grid.h - 1
+        w__, h__ = w_ / w, h_ / h
+
+        H = VectorExtractor.homographies(grid)
+
+        i = np.arange(left, w_ if right is None else right)[np.newaxis, :]
+        j = np.arange(top, h_ if bottom is None else bottom)[:, np.newaxis]
+        cell = (i / w__).astype(np.intp), (j / h__).astype(np.intp)
+
+        s, t = (i % w__) / w__, (j % h__) / h__
+        M = H[cell]
+
+        z = M[..., 2, 0] * s + M[..., 2, 1] * t + M[..., 2, 2]
+        X = (M[..., 0, 0] * s + M[..., 0, 1] * t + M[..., 0, 2]) / z
+        Y = (M[..., 1, 0] * s + M[..., 1, 1] * t + M[..., 1, 2]) / z
+
+        return X, Y
+
+    @staticmethod
+    def map(grid, mode, top=0, bottom=None, left=0, right=None):
+        """ source coordinates for the given extraction mode
+
+            see `VectorExtractor.mapQuadrilateral`,
+            `VectorExtractor.mapLinear`,
+            `VectorExtractor.mapPolynomial` and
+            `VectorExtractor.mapPerspective`; the coordinates are those
+            of the bound image (see `Grid.framed`)
+        """
+        grid = grid.framed()
+        calls = {
+            iap.MODE_QUAD: VectorExtractor.mapQuadrilateral,
+            iap.MODE_LINE: VectorExtractor.mapLinear,
+            iap.MODE_POLY: VectorExtractor.mapPolynomial,
+            iap.MODE_PERSP: VectorExtractor.mapPerspective
+        }
+        return calls[mode](grid, top, bottom, left, right)
+
+    @staticmethod
+    def index(X, Y, size):
+        """ flat indices of the pixels at coordinates `X` and `Y`
+
+            `size` is the size `(w, h)` of the sampled image; the
+            coordinates are truncated and negative ones are wrapped
+            as with `Image.getpixel`, which also raises an
+            `IndexError` on the same out of range coordinates
+
+            the indices are in pixels, as returned by `Util.toArray`
+            once reshaped to `(w * h, ..)`
+        """
+        w, h = size
+        X, Y = X.astype(np.intp), Y.astype(np.intp)
+        if ((X < -w) | (w <= X) | (Y < -h) | (h <= Y)).any():
+            raise IndexError("image index out of range")
+        return ((Y % h) * w + X % w).astype(VectorExtractor.indexType(size))
+
+    @staticmethod
+    def indexType(size):
+        """ type of the indices for an image of the given size
+
+            `numpy.int32` unless the image has too many pixels
+        """
+        w, h = size
+        return np.int32 if w * h <= np.iinfo(np.int32).max else np.int64
+
+    @staticmethod
+    def sample(buffer, index, out=None):
+        """ returns the pixels of `buffer` at every flat indices
+
+            `buffer` is an image as an array (see `Util.toArray`), the
+            returned array of pixels has the shape of the index array
+            (see `VectorExtractor.index`)
+
+            the pixels are written into the `out` array if given (the
+            indices are not checked again then)
+        """
+        flat = buffer.reshape(-1, *buffer.shape[2:])
+        if out is not None:
+            return np.take(flat, index, axis=0, out=out, mode='clip')
+        return np.take(flat, index, axis=0)
+
+    @staticmethod
+    def transformArray(pixels, transform, like):
+        """ applies `transform` to an array of pixels of `like` image
+
+            a `Transform` is applied to the whole array, otherwise the
+            `transform` function is called for each pixel (slow, but
+            same as with the `Extractor` class)
+
+            if `like` is an array, the values returned by the function
+            are only converted to the type of the pixels
+        """
+        if transform is None:
+            return pixels
+        if isinstance(transform, iap.Transform):
+            return transform.applyArray(pixels)
+
+        h, w = pixels.shape[:2]
+        if pixels.ndim == 2:
+            r = [transform(p) for p in pixels.reshape(w * h).tolist()]
+        else:
+            r = [transform(tuple(p))
+                 for p in pixels.reshape(w * h, -1).tolist()]
+        if isinstance(like, np.ndarray):
+            return np.array(r, pixels.dtype).reshape(pixels.shape)
+        result = iap.Util.newImage(like.mode, (w, h))
+        result.putdata(r)
+        return iap.Util.toArray(result)
+
+    @staticmethod
+    def gather(image, index, transform=None, buffer=None, out=None,
+               mode=None):
+        """ samples `image` at every flat indices of `index`
+
+            the returned image has the shape of the index array (see
+            `VectorExtractor.sample`), `transform` is applied with
+            `VectorExtractor.transformArray`
+
+            `buffer` can be given to avoid converting the image again
+            when gathering from the same image repeatedly (see
+            `Util.toArray`)
+
+            if an `out` array is given (see `Util.toBuffer`), the
+            pixels are written into it and it is returned instead of an
+            image; an array is also returned if `image` is an array
+
+            the phases are profiled (see `imagdapt.phase`), `mode` is
+            only given to the events
+        """
+        info = {'mode': mode, 'pixels': index.size}
+        if buffer is None:
+            w, h = iap.Util.imageSize(image)
+            buffer = iap.phase(
+                'decode',
+                lambda: iap.Util.toArray(image),
+                mode=mode, pixels=w * h
+            )
+        if out is not None and transform is None:
+            return iap.phase(
+                'sample',
+                lambda: VectorExtractor.sample(buffer, index, out),
+                **info
+            )
+
+        pixels = iap.phase(
+            'sample',
+            lambda: VectorExtractor.sample(buffer, index),
+            **info
+        )
+        if transform is not None:
+            pixels = iap.phase(
+                'transform',
+                lambda: VectorExtractor.transformArray(
+                    pixels,
+                    transform, image
+                ),
+                **info
+            )
+        if out is not None:
+            iap.phase(
+                'assemble',
+                lambda: np.copyto(out, pixels, casting='unsafe'),
+                **info
+            )
+            return out
+        return iap.phase(
+            'assemble',
+            lambda: iap.Util.fromArray(pixels, image),
+            **info
+        )
+
+    @staticmethod
+    def extractQuadrilateral(grid, additionalPixelTransform=None, out=None):
+        """ extraction algorithm for the `MODE_QUAD` mode
+
+            the coordinates are compiled once (see `Grid.compile`)
+        """
+        return grid.compile(iap.MODE_QUAD).apply(
+            grid.image,
+            additionalPixelTransform,
+            out
+        )
+
+    @staticmethod
+    def extractLinear(grid, additionalPixelTransform=None, out=None):
+        """ extraction algorithm for the `MODE_LINE` mode
+
+            the coordinates are compiled once (see `Grid.compile`)
+        """
+        return grid.compile(iap.MODE_LINE).apply(
+            grid.image,
+            additionalPixelTransform,
+            out
+        )
+
+    @staticmethod
+    def extractPolynomial(grid, additionalPixelTransform=None, out=None):
+        """ extraction algorithm for the `MODE_POLY` mode
+
+            the coordinates are compiled once (see `Grid.compile`)
+        """
+        return grid.compile(iap.MODE_POLY).apply(
+            grid.image,
+            additionalPixelTransform,
+            out
+        )
+
+    @staticmethod
+    def extractPerspective(grid, additionalPixelTransform=None, out=None):
+        """ extraction algorithm for the `MODE_PERSP` mode
+
+            the coordinates are compiled once (see `Grid.compile`)
+        """
+        return grid.compile(iap.MODE_PERSP).apply(
+            grid.image,
+            additionalPixelTransform,
+            out
+        )
@@ -0,0 +1,15 @@
+import imagdapt as iap
+import numpy as np
+import pytest
+from imagdapt.cases import locations, makeGrid, picturePath
+
+
+@pytest.mark.parametrize('name', sorted(locations))
+@pytest.mark.parametrize('mode', [iap.MODE_QUAD, iap.MODE_LINE])
+def test_numpy_engine_matches_pixel_engine(name, mode):
+    grid = makeGrid(name)
+    grid.bind(iap.Util.openImage(picturePath(name)), locations[name][1])
+    expected = grid.extract(mode, engine=iap.ENGINE_PIXEL)
+    result = grid.extract(mode, engine=iap.ENGINE_NUMPY)
+    assert result.size == expected.size and result.mode == expected.mode
+    assert np.array_equal(np.asarray(result), np.asarray(expected))
@@ -0,0 +1,42 @@
+import imagdapt as iap
+import numpy as np
+import pytest
+from imagdapt.cases import makeGrid, picturePath
+
+
+MOVES = [
+    (2, 0, (6, -5)),    # border
+    (0, 0, (-7, 4)),    # corner
+    (5, 4, (5, 6)),     # opposite corner
+    (2, 2, (-4, 3)),    # inner
+    (3, 1, (3, -6)),    # inner, next to the border
+    (0, 3, (8, 2))      # border
+]
+
+
+@pytest.mark.parametrize('mode', [
+    iap.MODE_QUAD, iap.MODE_LINE, iap.MODE_POLY, iap.MODE_PERSP
+])
+def test_incremental_matches_full_extraction(mode):
+    grid = makeGrid("test", (6, 5))
+    grid.bind(iap.Util.openImage(picturePath("test")), (300, 120))
+    grid.extractIncremental(mode)
+
+    for i, j, (dx, dy) in MOVES:
+        p = grid[i, j]
+        grid[i, j] = iap.Point(p.x + dx, p.y + dy)
+        assert grid.dirty == {(i, j)}
+        result = grid.extractIncremental(mode)
+        expected = grid.extract(mode, engine=iap.ENGINE_NUMPY)
+        assert np.array_equal(np.asarray(result), np.asarray(expected))
+        assert not grid.dirty
+
+def test_dirty_rects():
+    grid = makeGrid("test", (6, 5))
+    grid.bind(iap.Util.openImage(picturePath("test")), (300, 120))
+    grid[2, 2] = grid[2, 2]
+    assert grid.dirtyRects(iap.MODE_QUAD) == []
+    assert len(grid.dirtyRects(iap.MODE_LINE)) == 4
+    assert len(grid.dirtyRects(iap.MODE_POLY)) == 16
+    grid[0, 0] = grid[0, 0]
+    assert grid.dirtyRects(iap.MODE_QUAD) == [(0, 120, 0, 300)]
@@ -0,0 +1,42 @@
+import imagdapt as iap
+
+
+def record(profile, times):
+    for time in times:
+        profile({'phase': 'sample', 'time': time, 'pixels': 10})
+    return profile
+
+def test_percentiles_are_nearest_rank():
+    profile = record(iap.Profile(), range(100, 0, -1))
+    assert profile.percentile('sample', 50) == 50
+    assert profile.percentile('sample', 90) == 90
+    assert profile.percentile('sample', 99) == 99
+    assert profile.percentile('sample', 100) == 100
+    assert profile.percentile('sample', 0) == 1
+
+def test_percentiles_of_few_events():
+    profile = record(iap.Profile(), [7, 3])
+    assert profile.percentile('sample', 50) == 3
+    assert profile.percentile('sample', 99) == 7
+    assert profile.percentile('other', 50) is None
+
+def test_stats():
+    stats = record(iap.Profile(), range(1, 101)).stats()['sample']
+    assert (stats['p50'], stats['p90'], stats['p99']) == (50, 90, 99)
+    assert stats['count'] == 100 and stats['max'] == 100
+    assert stats['pixels'] == 1000
+
+def test_sink_receives_extraction_phases():
+    grid = iap.Grid(
+        2, 2,
+        topLeft=iap.Point(0, 0), topRight=iap.Point(9, 0),
+        bottomRight=iap.Point(9, 9), bottomLeft=iap.Point(0, 9)
+    )
+    grid.bind(iap.Util.newImage('RGB', (10, 10)), (4, 4))
+    profile = iap.addSink(iap.Profile())
+    try:
+        grid.extract(iap.MODE_LINE, engine=iap.ENGINE_NUMPY)
+    finally:
+        iap.removeSink(profile)
+    assert {'extract', 'sample', 'assemble'} <= set(profile.stats())
+    assert profile.stats()['extract']['pixels'] == 16
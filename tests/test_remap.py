@@ -0,0 +1,75 @@
+import imagdapt as iap
+import numpy as np
+import pickle
+import pytest
+from imagdapt.cases import locations, makeGrid, picturePath
+
+
+def boundGrid():
+    grid = makeGrid("test")
+    grid.bind(iap.Util.openImage(picturePath("test")), locations["test"][1])
+    return grid
+
+def test_save_load_round_trip(tmp_path):
+    grid = boundGrid()
+    remap = grid.compile(iap.MODE_LINE)
+    remap.save(tmp_path / "line.remap")
+
+    loaded = iap.Remap.load(tmp_path / "line.remap")
+    assert isinstance(loaded.index, np.memmap)
+    assert (loaded.mode, loaded.target, loaded.source) == (
+        remap.mode, remap.target, remap.source
+    )
+    assert np.array_equal(loaded.index, remap.index)
+
+    other = iap.Grid(2).loadRemap(tmp_path / "line.remap")
+    other.bind(grid.image, other.target)
+    assert np.array_equal(
+        np.asarray(other.extract(iap.MODE_LINE, engine=iap.ENGINE_NUMPY)),
+        np.asarray(grid.extract(iap.MODE_LINE, engine=iap.ENGINE_NUMPY))
+    )
+
+@pytest.mark.parametrize('magic, version', [
+    (b"NOTAREMA", iap.Remap.VERSION),
+    (iap.Remap.MAGIC, iap.Remap.VERSION + 1)
+])
+def test_load_rejects_bad_header(tmp_path, magic, version):
+    path = tmp_path / "bad.remap"
+    path.write_bytes(
+        iap.Remap.HEADER.pack(magic, version, iap.MODE_LINE, 4, 1, 1, 1, 1)
+        + bytes(4)
+    )
+    with pytest.raises(ValueError):
+        iap.Remap.load(path)
+
+def test_load_rejects_truncated_header(tmp_path):
+    path = tmp_path / "short.remap"
+    path.write_bytes(iap.Remap.MAGIC)
+    with pytest.raises(ValueError):
+        iap.Remap.load(path)
+
+def test_loaded_remap_pickles_as_its_path(tmp_path):
+    path = str(tmp_path / "line.remap")
+    boundGrid().compile(iap.MODE_LINE).save(path)
+    loaded = iap.Remap.load(path)
+
+    assert loaded.__reduce__() == (iap.Remap.load, (path,))
+    data = pickle.dumps(loaded)
+    assert len(data) < 1024
+    again = pickle.loads(data)
+    assert again.path == path
+    assert np.array_equal(again.index, loaded.index)
+
+def test_moving_a_point_view_misses_the_cache():
+    grid = boundGrid()
+    grid.compile(iap.MODE_LINE)
+    key = iap.Remap.key(grid, iap.MODE_LINE)
+
+    misses = iap.Remap.cache.misses
+    grid.compile(iap.MODE_LINE)
+    assert iap.Remap.cache.misses == misses
+
+    grid[1, 1].x+= 3
+    assert iap.Remap.key(grid, iap.MODE_LINE) != key
+    grid.compile(iap.MODE_LINE)
+    assert iap.Remap.cache.misses == misses + 1